@@ -1,22 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import uuid
-from app.database import get_db
+from app import repositories
+from app.database import get_async_db
 from app.models import User
 from app.schemas import UserRegister, UserLogin, UserResponse, TokenResponse
-from app.auth import hash_password, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from app.auth import hash_password, verify_and_update_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from app.services.executor import run_password_hashing
+from app.services.user_cache import get_cached_profile, cache_profile
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=TokenResponse)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, session: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
         # Check if user already exists
-        existing_user = db.query(User).filter(
-            (User.email == user_data.email) | (User.username == user_data.username)
-        ).first()
+        existing_user = await repositories.find_user(session, user_data.email, user_data.username)
         
         if existing_user:
             raise HTTPException(
@@ -29,15 +30,13 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             id=str(uuid.uuid4()),
             email=user_data.email,
             username=user_data.username,
-            hashed_password=hash_password(user_data.password),
+            hashed_password=await run_password_hashing(hash_password, user_data.password),
             user_type=user_data.user_type,
             full_name=user_data.full_name,
             company=user_data.company
         )
         
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        user = await repositories.add_user(session, user)
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -54,19 +53,24 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, session: AsyncSession = Depends(get_async_db)):
     """Login user"""
     try:
-        user = db.query(User).filter(User.email == credentials.email).first()
+        user = await repositories.get_user_by_email(session, credentials.email)
+        valid, new_hash = False, None
+        if user:
+            valid, new_hash = await run_password_hashing(
+                verify_and_update_password, credentials.password, user.hashed_password
+            )
         
-        if not user or not verify_password(credentials.password, user.hashed_password):
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -78,6 +82,11 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
                 detail="User account is inactive"
             )
         
+        # Hash made with outdated Argon2 parameters, store the upgraded one
+        if new_hash:
+            user.hashed_password = new_hash
+            await session.commit()
+        
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
@@ -99,13 +108,17 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get current user info"""
+async def get_current_user_info(current_user: dict = Depends(get_current_user), session: AsyncSession = Depends(get_async_db)):
+    """Get current user info (served from the profile cache when possible)"""
     try:
-        user = db.query(User).filter(User.id == current_user["sub"]).first()
+        profile = get_cached_profile(current_user["sub"])
+        if profile is not None:
+            return profile
+        
+        user = await repositories.get_user(session, current_user["sub"])
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        return user
+        return cache_profile(user)
     except HTTPException:
         raise
     except Exception as e:
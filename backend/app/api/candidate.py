@@ -1,14 +1,21 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, Query, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 import uuid
-from app.database import get_db
-from app.models import Resume, Job, JobMatch
+from app import repositories
+from app.database import get_db, get_async_db
+from app.models import Resume
 from app.schemas import ResumeResponse, JobResponse
 from app.auth import get_current_candidate
-from app.services.resume_service import save_and_extract_resume
-from app.services.ai_engine import calculate_match
-from app.services.bias_checker import check_bias, detect_bias
-from app.services.github_verifier import GitHubVerifier
+from app.pagination import set_next_cursor
+from app.services.resume_service import ingest_resume
+from app.services.ai_engine import MATCH_CHUNKING, calculate_match_batch
+from app.services.embedding_cache import get_resume_embeddings, get_resume_chunk_embeddings
+from app.services.bias_checker import check_bias
+from app.services.github_verifier import github_verifier
+from app.services.vector_index import get_resume_index
+from app.services.executor import run_blocking
 
 router = APIRouter(prefix="/candidate", tags=["candidate"])
 
@@ -16,45 +23,62 @@ router = APIRouter(prefix="/candidate", tags=["candidate"])
 async def upload_resume(
     resume: UploadFile = Form(...),
     current_user: dict = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_db),
     db: Session = Depends(get_db)
 ):
     """Upload a new resume"""
     try:
-        resume_id, resume_text = save_and_extract_resume(resume)
+        content = await ingest_resume(resume, db)
+        resume_id = str(uuid.uuid4())
+        resume_text = content.text
         
-        # Extract skills
-        skill_keywords = ['python', 'javascript', 'react', 'java', 'sql', 'aws', 'docker', 'git', 'typescript', 'nodejs', 'fastapi', 'django', 'flask', 'postgresql', 'mongodb', 'kubernetes']
-        skills = [kw for kw in skill_keywords if kw in resume_text.lower()]
+        # Skills are extracted once per unique file
+        skills = content.skills or []
         
         # Extract GitHub projects
-        github_projects = GitHubVerifier.extract_github_links(resume_text)
+        github_projects = await github_verifier.extract_github_links(resume_text)
         
         # Save resume to database
         resume_obj = Resume(
             id=resume_id,
             candidate_id=current_user["sub"],
             filename=resume.filename,
-            file_path=str(resume_id + "_" + resume.filename),
-            extracted_text=resume_text[:1000],  # Store first 1000 chars
+            file_path=content.file_path,
+            content_hash=content.content_hash,
+            extracted_text=resume_text[:1000],  # Preview, the full text stays in resume_contents
             skills=skills,
             github_projects=github_projects,
             is_primary=True  # Set as primary for now
         )
-        db.add(resume_obj)
-        db.commit()
-        db.refresh(resume_obj)
+        resume_obj = await repositories.add_resume(session, resume_obj)
+        
+        # Make the resume searchable by recruiters
+        resume_embeddings = await run_blocking(get_resume_embeddings, db, [content])
+        if resume_embeddings is not None:
+            index = await run_blocking(get_resume_index, db)
+            await run_blocking(index.add, resume_obj.id, resume_embeddings[0])
         
         return ResumeResponse.from_orm(resume_obj)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/resumes", response_model=list[ResumeResponse])
 async def get_resumes(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_candidate),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
-    """Get all resumes for candidate"""
-    resumes = db.query(Resume).filter(Resume.candidate_id == current_user["sub"]).all()
+    """Get resumes for candidate, newest first.
+    
+    Keyset paginated via X-Next-Cursor when ``limit`` is given, every
+    resume otherwise.
+    """
+    resumes, next_cursor = await repositories.list_candidate_resumes(session, current_user["sub"], cursor, limit)
+    set_next_cursor(response, next_cursor)
     return [ResumeResponse.from_orm(r) for r in resumes]
 
 @router.post("/match-resume")
@@ -66,17 +90,24 @@ async def match_resume(
 ):
     """Match resume against job description"""
     try:
-        resume_id, resume_text = save_and_extract_resume(resume)
-        match_result = calculate_match(resume_text, job_description)
+        content = await ingest_resume(resume, db, persist=False)
+        resume_text = content.text
+        if MATCH_CHUNKING:
+            vectors = {"resume_chunks": await run_blocking(get_resume_chunk_embeddings, db, [content])}
+        else:
+            vectors = {"resume_embeddings": await run_blocking(get_resume_embeddings, db, [content])}
+        match_result = (await run_blocking(
+            calculate_match_batch, [resume_text], job_description, **vectors
+        ))[0]
         
         # Add bias check
-        bias_result = check_bias(job_description, resume_text)
+        bias_result = check_bias(job_description)
         
         # Extract and verify GitHub projects
-        github_projects = GitHubVerifier.extract_github_links(resume_text)
+        github_projects = await github_verifier.extract_github_links(resume_text)
         
         return {
-            "resume_id": resume_id,
+            "resume_id": content.content_hash,
             "filename": resume.filename,
             "match_score": match_result.get("match_score", 0),
             "matched_skills": match_result.get("matched_skills", []),
@@ -87,23 +118,23 @@ async def match_resume(
             "github_projects": github_projects,
             "projects_verified": sum(1 for p in github_projects if p.get("exists", False))
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.post("/analyze-resume")
-async def analyze_resume(resume: UploadFile):
+async def analyze_resume(resume: UploadFile, db: Session = Depends(get_db)):
     """Analyze resume without job matching"""
-    resume_id, resume_text = save_and_extract_resume(resume)
-    
-    # Extract skills
-    skill_keywords = ['python', 'javascript', 'react', 'java', 'sql', 'aws', 'docker', 'git', 'typescript', 'nodejs', 'fastapi', 'django', 'flask', 'postgresql', 'mongodb', 'kubernetes', 'tensorflow', 'pytorch']
-    skills = [kw for kw in skill_keywords if kw in resume_text.lower()]
+    content = await ingest_resume(resume, db, persist=False)
+    resume_text = content.text
+    skills = content.skills or []
     
     # Extract GitHub projects
-    github_projects = GitHubVerifier.extract_github_links(resume_text)
+    github_projects = await github_verifier.extract_github_links(resume_text)
     
     return {
-        "resume_id": resume_id,
+        "resume_id": content.content_hash,
         "filename": resume.filename,
         "skills": list(set(skills)),
         "word_count": len(resume_text.split()),
@@ -113,38 +144,23 @@ async def analyze_resume(resume: UploadFile):
 
 @router.get("/jobs", response_model=list[JobResponse])
 async def get_matching_jobs(
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     current_user: dict = Depends(get_current_candidate),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
-    """Get jobs that match candidate's skills"""
-    # Get candidate's primary resume
-    resume = db.query(Resume).filter(
-        (Resume.candidate_id == current_user["sub"]) & (Resume.is_primary == True)
-    ).first()
+    """Get jobs that match candidate's skills.
     
-    if not resume:
-        return []
-    
-    # Get all active jobs
-    jobs = db.query(Job).filter(Job.is_active == True).all()
-    
-    # Score jobs based on skill match
-    scored_jobs = []
-    for job in jobs:
-        if job.required_skills:
-            match_count = len([s for s in job.required_skills if s in resume.skills])
-            score = (match_count / len(job.required_skills)) * 100 if job.required_skills else 0
-            if score > 0:
-                scored_jobs.append((job, score))
-    
-    # Sort by score and return
-    scored_jobs.sort(key=lambda x: x[1], reverse=True)
-    return [JobResponse.from_orm(job) for job, _ in scored_jobs]
+    Served from the precomputed job_recommendations table, which is kept up
+    to date when jobs are saved and when the candidate uploads a resume.
+    Without ``limit`` every recommended job is returned.
+    """
+    jobs = await repositories.get_recommended_jobs(session, current_user["sub"], limit, offset)
+    return [JobResponse.from_orm(job) for job in jobs]
 
 @router.get("/applied-jobs")
 async def get_applied_jobs(
-    current_user: dict = Depends(get_current_candidate),
-    db: Session = Depends(get_db)
+    current_user: dict = Depends(get_current_candidate)
 ):
     """Get all jobs candidate has applied to"""
     # This would need to track applications - simplified version
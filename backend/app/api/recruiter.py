@@ -1,23 +1,32 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 import uuid
-from app.database import get_db
-from app.models import Job, Resume, JobMatch, HiringDecision, User
-from app.schemas import JobCreate, JobUpdate, JobResponse, JobMatchResponse, HiringDecisionCreate, HiringDecisionResponse
+from app import repositories
+from app.database import get_db, get_async_db, SessionLocal
+from app.models import Job
+from app.schemas import JobCreate, JobUpdate, JobResponse, JobMatchResponse, HiringDecisionCreate, HiringDecisionResponse, ResumeSearchResult, RescoreRequest
 from app.auth import get_current_recruiter
-from app.services.ai_engine import rank_resumes, calculate_match
-from app.services.resume_service import save_and_extract_resume
-from app.services.bias_checker import check_bias, detect_bias
-from app.services.github_verifier import GitHubVerifier
+from app.pagination import keyset, ndjson_stream, set_next_cursor
+from app.services.resume_service import ingest_resumes, find_stored_resumes
+from app.services.uploads import receive_uploads
+from app.services.embedding_cache import get_job_embedding, invalidate_job_embedding
+from app.services.vector_index import get_resume_index
+from app.services.executor import run_blocking
+from app.services.ranking_service import evaluate_resumes
+from app.services.ingestion import ingestion_queue
 
 router = APIRouter(prefix="/recruiter", tags=["recruiter"])
 
+# Most stored resumes scored by one rescore request
+RESCORE_MAX_RESUMES = 500
+
 @router.post("/jobs", response_model=JobResponse)
 async def create_job(
     job_data: JobCreate,
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Create a new job posting"""
     job = Job(
@@ -30,21 +39,17 @@ async def create_job(
         salary_range=job_data.salary_range,
         location=job_data.location
     )
-    db.add(job)
-    db.commit()
-    db.refresh(job)
+    job = await repositories.save_job(session, job)
     return JobResponse.from_orm(job)
 
 @router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: str,
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Get job details"""
-    job = db.query(Job).filter(
-        and_(Job.id == job_id, Job.recruiter_id == current_user["sub"])
-    ).first()
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
     
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -52,11 +57,20 @@ async def get_job(
 
 @router.get("/jobs", response_model=list[JobResponse])
 async def list_jobs(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
-    """List all jobs for recruiter"""
-    jobs = db.query(Job).filter(Job.recruiter_id == current_user["sub"]).all()
+    """List jobs for recruiter, newest first.
+    
+    Keyset paginated when ``limit`` is given: pass the X-Next-Cursor
+    response header back as ``cursor`` to fetch the next page. Without
+    ``limit`` every job is returned.
+    """
+    jobs, next_cursor = await repositories.list_recruiter_jobs(session, current_user["sub"], cursor, limit)
+    set_next_cursor(response, next_cursor)
     return [JobResponse.from_orm(job) for job in jobs]
 
 @router.put("/jobs/{job_id}", response_model=JobResponse)
@@ -64,12 +78,10 @@ async def update_job(
     job_id: str,
     job_data: JobUpdate,
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Update job posting"""
-    job = db.query(Job).filter(
-        and_(Job.id == job_id, Job.recruiter_id == current_user["sub"])
-    ).first()
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
     
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -78,172 +90,209 @@ async def update_job(
     for field, value in update_data.items():
         setattr(job, field, value)
     
-    db.commit()
-    db.refresh(job)
+    job = await repositories.save_job(session, job)
+    await session.run_sync(invalidate_job_embedding, job.id)
     return JobResponse.from_orm(job)
 
 @router.post("/jobs/{job_id}/rank-candidates")
 async def rank_candidates(
     job_id: str,
     resumes: list[UploadFile] = Form(...),
+    background: bool = Query(False),
     current_user: dict = Depends(get_current_recruiter),
+    session: AsyncSession = Depends(get_async_db),
     db: Session = Depends(get_db)
 ):
-    """Rank candidates for a job"""
-    job = db.query(Job).filter(
-        and_(Job.id == job_id, Job.recruiter_id == current_user["sub"])
-    ).first()
+    """Rank candidates for a job.
+    
+    With ``background=true`` the uploads are queued and a token is returned
+    immediately; progress is streamed over ``/ws/analyze?token=...&access_token=...``.
+    Parsing and scoring keep using a sync session on the I/O pool.
+    """
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
     
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
+    if background:
+        # Queued uploads wait on disk, not in memory
+        uploads = await receive_uploads(resumes, spool_bytes=0)
+        ingestion_job = await ingestion_queue.submit(job_id, current_user["sub"], uploads)
+        return ingestion_job.summary()
+    
     try:
-        results = []
-        for resume_file in resumes:
-            try:
-                resume_id, resume_text = save_and_extract_resume(resume_file)
-                
-                # Calculate match
-                match_result = calculate_match(resume_text, job.description)
-                
-                # Check bias
-                bias_result = check_bias(job.description, resume_text)
-                
-                # Extract GitHub projects
-                github_projects = GitHubVerifier.extract_github_links(resume_text)
-                verified_count = sum(1 for p in github_projects if p.get("exists", False))
-                
-                # Save to database
-                job_match = JobMatch(
-                    id=str(uuid.uuid4()),
-                    job_id=job_id,
-                    resume_id=resume_id,
-                    match_score=match_result.get("match_score", 0),
-                    matched_skills=match_result.get("matched_skills", []),
-                    missing_skills=match_result.get("missing_skills", []),
-                    bias_risk_level=bias_result.get("risk_level", "Low"),
-                    bias_findings=bias_result.get("findings", []),
-                    projects_verified=verified_count
-                )
-                db.add(job_match)
-                
-                results.append({
-                    "filename": resume_file.filename,
-                    "resume_id": resume_id,
-                    "match_score": match_result.get("match_score", 0),
-                    "matched_skills": match_result.get("matched_skills", []),
-                    "missing_skills": match_result.get("missing_skills", []),
-                    "bias_risk": bias_result.get("risk_level", "Low"),
-                    "github_projects": github_projects,
-                    "verified_projects": verified_count
-                })
-            except Exception as e:
-                print(f"Error processing resume {resume_file.filename}: {e}")
+        # Extract every upload first so the texts can be scored in one batch
+        extracted = []
+        # Upload validation errors are raised by ingest_resumes itself, a
+        # failure here only concerns that one file
+        for filename, content in await ingest_resumes(resumes, db, persist=False):
+            if isinstance(content, BaseException):
+                print(f"Error processing resume {filename}: {content}")
                 continue
+            extracted.append((filename, str(uuid.uuid4()), content))
+        
+        results = await evaluate_resumes(db, job, extracted)
+        
+        await run_blocking(db.commit)
+        return {
+            "job_id": job_id,
+            "total_resumes": len(results),
+            "results": sorted(results, key=lambda x: x["match_score"], reverse=True)
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.post("/jobs/{job_id}/rescore")
+async def rescore_candidates(
+    job_id: str,
+    request: RescoreRequest,
+    current_user: dict = Depends(get_current_recruiter),
+    session: AsyncSession = Depends(get_async_db),
+    db: Session = Depends(get_db)
+):
+    """Score stored resumes against a job without re-parsing any file.
+    
+    Uses the extracted text and embeddings kept per resume content, and
+    replaces earlier matches of the same resumes for this job. Resumes that
+    do not exist or have no stored text are listed under ``missing``.
+    """
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
+    
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    resume_ids = list(dict.fromkeys(request.resume_ids))
+    if len(resume_ids) > RESCORE_MAX_RESUMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {RESCORE_MAX_RESUMES} resumes can be rescored at once"
+        )
+    
+    try:
+        stored = await run_blocking(find_stored_resumes, db, resume_ids)
+        extracted = [(resume.filename, resume.id, content) for resume, content in stored]
+        results = await evaluate_resumes(db, job, extracted, replace=True)
         
-        db.commit()
+        found = {resume.id for resume, _ in stored}
         return {
             "job_id": job_id,
             "total_resumes": len(results),
+            "missing": [resume_id for resume_id in resume_ids if resume_id not in found],
             "results": sorted(results, key=lambda x: x["match_score"], reverse=True)
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@router.get("/ingestion/{token}")
+async def get_ingestion_status(
+    token: str,
+    current_user: dict = Depends(get_current_recruiter)
+):
+    """Progress and current ranking of a background rank-candidates upload"""
+    ingestion_job = await ingestion_queue.find(token)
+    if not ingestion_job or ingestion_job.recruiter_id != current_user["sub"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion job not found")
+    
+    return {**ingestion_job.summary(), "results": ingestion_job.ranking()}
+
 @router.get("/jobs/{job_id}/candidates", response_model=list[JobMatchResponse])
 async def get_job_candidates(
     job_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
-    """Get all candidates for a job sorted by match score"""
-    job = db.query(Job).filter(
-        and_(Job.id == job_id, Job.recruiter_id == current_user["sub"])
-    ).first()
+    """Get candidates for a job sorted by match score.
+    
+    Keyset paginated on (match_score, id) when ``limit`` is given; pass the
+    X-Next-Cursor response header back as ``cursor``. Without ``limit``
+    every match is returned. ``format=ndjson`` streams every match after
+    ``cursor`` as newline-delimited JSON for bulk exports.
+    """
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
     
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
-    matches = db.query(JobMatch).filter(JobMatch.job_id == job_id).order_by(JobMatch.match_score.desc()).all()
+    if export_format == "ndjson":
+        return ndjson_stream(
+            SessionLocal,
+            lambda s: keyset(repositories.job_matches_query(s, job_id), repositories.MATCH_ORDER, cursor),
+            lambda match: JobMatchResponse.from_orm(match).json()
+        )
+    
+    matches, next_cursor = await repositories.list_job_matches(session, job_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return [JobMatchResponse.from_orm(match) for match in matches]
 
+@router.get("/jobs/{job_id}/search", response_model=list[ResumeSearchResult])
+async def search_candidates(
+    job_id: str,
+    top_k: int = Query(10, ge=1, le=200),
+    current_user: dict = Depends(get_current_recruiter),
+    session: AsyncSession = Depends(get_async_db),
+    db: Session = Depends(get_db)
+):
+    """Find the stored resumes closest to a job description"""
+    job = await repositories.get_recruiter_job(session, job_id, current_user["sub"])
+    
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    jd_embedding = await run_blocking(get_job_embedding, db, job)
+    if jd_embedding is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Embedding model unavailable")
+    
+    index = await run_blocking(get_resume_index, db)
+    hits = await run_blocking(index.search, jd_embedding, top_k)
+    resumes = await repositories.get_resumes(session, [resume_id for resume_id, _ in hits])
+    
+    return [
+        ResumeSearchResult(
+            resume_id=resume_id,
+            candidate_id=resumes[resume_id].candidate_id,
+            filename=resumes[resume_id].filename,
+            skills=resumes[resume_id].skills,
+            score=round(score * 100, 2)
+        )
+        for resume_id, score in hits if resume_id in resumes
+    ]
+
 @router.post("/candidates/{candidate_id}/decision", response_model=HiringDecisionResponse)
 async def make_hiring_decision(
     candidate_id: str,
     decision_data: HiringDecisionCreate,
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Make hiring decision for a candidate"""
-    job = db.query(Job).filter(Job.id == decision_data.job_id).first()
+    job = await repositories.get_job(session, decision_data.job_id)
     if not job or job.recruiter_id != current_user["sub"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     
-    # Check if decision already exists
-    existing_decision = db.query(HiringDecision).filter(
-        and_(
-            HiringDecision.job_id == decision_data.job_id,
-            HiringDecision.candidate_id == candidate_id
-        )
-    ).first()
-    
-    if existing_decision:
-        existing_decision.status = decision_data.status
-        existing_decision.feedback = decision_data.feedback
-        db.commit()
-        db.refresh(existing_decision)
-        return HiringDecisionResponse.from_orm(existing_decision)
-    
-    decision = HiringDecision(
-        id=str(uuid.uuid4()),
+    decision = await repositories.upsert_hiring_decision(
+        session,
         job_id=decision_data.job_id,
         candidate_id=candidate_id,
         status=decision_data.status,
         feedback=decision_data.feedback,
         created_by=current_user["sub"]
     )
-    db.add(decision)
-    db.commit()
-    db.refresh(decision)
     return HiringDecisionResponse.from_orm(decision)
 
 @router.get("/analytics")
 async def get_analytics(
     current_user: dict = Depends(get_current_recruiter),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Get recruiter analytics"""
-    # Total jobs
-    total_jobs = db.query(Job).filter(Job.recruiter_id == current_user["sub"]).count()
-    
-    # Total candidates matched
-    recruiter_jobs = db.query(Job.id).filter(Job.recruiter_id == current_user["sub"]).all()
-    job_ids = [j[0] for j in recruiter_jobs]
-    total_candidates = db.query(JobMatch).filter(JobMatch.job_id.in_(job_ids)).count() if job_ids else 0
-    
-    # Average match score
-    matches = db.query(JobMatch).filter(JobMatch.job_id.in_(job_ids)).all() if job_ids else []
-    avg_score = sum([m.match_score for m in matches]) / len(matches) if matches else 0
-    
-    # Hiring funnel
-    decisions = db.query(HiringDecision).filter(HiringDecision.job_id.in_(job_ids)).all() if job_ids else []
-    funnel = {
-        "applied": len([d for d in decisions if d.status == "applied"]),
-        "shortlisted": len([d for d in decisions if d.status == "shortlisted"]),
-        "rejected": len([d for d in decisions if d.status == "rejected"]),
-        "offered": len([d for d in decisions if d.status == "offered"]),
-        "hired": len([d for d in decisions if d.status == "hired"])
-    }
-    
-    # Bias alerts
-    bias_alerts = len([m for m in matches if m.bias_risk_level == "High"])
-    
-    return {
-        "total_jobs": total_jobs,
-        "total_candidates": total_candidates,
-        "average_match_score": round(avg_score, 2),
-        "hiring_funnel": funnel,
-        "bias_alerts": bias_alerts,
-        "top_skills": ["Python", "JavaScript", "React", "AWS", "Docker"]  # Can be calculated from data
-    }
+    return await repositories.get_recruiter_analytics(session, current_user["sub"])
@@ -1,7 +1,10 @@
 import os
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -14,13 +17,27 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-this-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Argon2 cost, hashes made with other values are upgraded on the next login
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Verified tokens kept in memory, repeat requests skip the signature check
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
 pwd_context = CryptContext(
     schemes=["argon2"],
-    deprecated="auto"
+    deprecated="auto",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM
 )
 
 security = HTTPBearer()
 
+_token_cache = OrderedDict()  # token -> verified claims
+_token_cache_lock = threading.Lock()
+
 # ===================== PASSWORD UTILS =====================
 
 def hash_password(password: str) -> str:
@@ -36,6 +53,13 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
     return pwd_context.verify(plain_password, hashed_password)
 
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify password, also returning a new hash when the stored one uses outdated parameters"""
+    if not plain_password or not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 # ===================== JWT UTILS =====================
 
 def create_access_token(
@@ -54,7 +78,34 @@ def create_access_token(
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _cached_claims(token: str) -> Optional[dict]:
+    with _token_cache_lock:
+        claims = _token_cache.get(token)
+        if claims is None:
+            return None
+        if claims["exp"] <= time.time():
+            # Expired, let jwt.decode report it
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return dict(claims)
+
+
+def _cache_claims(token: str, claims: dict) -> None:
+    if "exp" not in claims:
+        return
+    with _token_cache_lock:
+        _token_cache[token] = claims
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
 def decode_token(token: str) -> dict:
+    """Verified claims of a token, from the token cache when possible"""
+    claims = _cached_claims(token)
+    if claims is not None:
+        return claims
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -64,7 +115,8 @@ def decode_token(token: str) -> dict:
                 detail="Invalid token"
             )
 
-        return payload
+        _cache_claims(token, payload)
+        return dict(payload)
 
     except JWTError:
         raise HTTPException(
@@ -74,13 +126,15 @@ def decode_token(token: str) -> dict:
 
 # ===================== DEPENDENCIES =====================
 
-def get_current_user(
+# Dependencies are async so cached lookups do not pay for a threadpool hop
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     return decode_token(credentials.credentials)
 
 
-def get_current_recruiter(
+async def get_current_recruiter(
     current_user: dict = Depends(get_current_user)
 ) -> dict:
     if current_user.get("user_type") != "recruiter":
@@ -91,7 +145,7 @@ def get_current_recruiter(
     return current_user
 
 
-def get_current_candidate(
+async def get_current_candidate(
     current_user: dict = Depends(get_current_user)
 ) -> dict:
     if current_user.get("user_type") != "candidate":
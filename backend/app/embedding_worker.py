@@ -0,0 +1,60 @@
+"""Shared embedding worker.
+
+One process holds the model weights and serves every API worker on the
+host, instead of each uvicorn worker loading its own copy:
+
+    uvicorn app.embedding_worker:app --port 8001 --workers 1
+    EMBEDDING_SERVICE_URL=http://127.0.0.1:8001 uvicorn app.main:app --workers 4
+
+The worker itself encodes with EMBEDDING_BACKEND=torch (default) or onnx.
+
+Vectors are returned as raw float32 bytes with their shape in a header.
+"""
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response, status
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.services.ai_engine import EMBEDDING_MODEL_ID, EMBED_BATCH_SIZE, load_local_model
+
+app = FastAPI(title="Embedding worker")
+
+_model = None
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    batch_size: Optional[int] = None
+    normalize: bool = False
+
+@app.on_event("startup")
+def startup():
+    global _model
+    _model = load_local_model()
+    if _model is not None:
+        _model.encode(["warm up"], normalize_embeddings=True)
+
+@app.get("/ready")
+def ready(response: Response):
+    if _model is None:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"model_name": EMBEDDING_MODEL_ID, "ready": _model is not None}
+
+@app.post("/embed")
+def embed(request: EmbedRequest):
+    """Encode texts for an API worker"""
+    if _model is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model not loaded")
+    if not request.texts:
+        return Response(content=b"", media_type="application/octet-stream",
+                        headers={"X-Model-Name": EMBEDDING_MODEL_ID, "X-Embedding-Shape": "0,0"})
+    
+    embs = np.asarray(_model.encode(
+        request.texts,
+        batch_size=request.batch_size or EMBED_BATCH_SIZE,
+        normalize_embeddings=request.normalize
+    ), dtype=np.float32).reshape(len(request.texts), -1)
+    return Response(
+        content=embs.tobytes(),
+        media_type="application/octet-stream",
+        headers={"X-Model-Name": EMBEDDING_MODEL_ID, "X-Embedding-Shape": f"{embs.shape[0]},{embs.shape[1]}"}
+    )
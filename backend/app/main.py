@@ -1,15 +1,22 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-import asyncio
 from app.api import recruiter, candidate, auth
-from app.database import Base, engine
-from app.models import User, Job, Resume, JobMatch, HiringDecision
+from app.auth import decode_token
+from app.database import engine, SessionLocal, dispose_async_engine
+from app.migrations import run_migrations
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.ai_engine import MODEL_WARMUP, warm_up_model, model_status
+from app.services.executor import shutdown_executors
+from app.services.github_verifier import github_verifier
+from app.services.ingestion import ingestion_queue
+from app.services.skill_matcher import get_skill_matcher
+from app.services.job_index import ensure_job_index
+from app.services.analytics import ensure_skill_stats
+from app.models import User, Job, JobEmbedding, JobSkill, CandidateSkill, JobRecommendation, Resume, ResumeContent, JobMatch, JobSkillStat, HiringDecision
 
-# Create tables
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Error creating tables: {e}")
+# Create tables and apply schema migrations; the app must not start on a
+# half-migrated schema, so errors propagate
+run_migrations(engine)
 
 app = FastAPI(
     title="AI Hiring SaaS",
@@ -24,6 +31,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Page cursors travel in a response header, which the SPA's origin
+    # can only read when it is exposed
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -31,6 +41,29 @@ app.include_router(auth.router)
 app.include_router(recruiter.router)
 app.include_router(candidate.router)
 
+@app.on_event("startup")
+def startup():
+    # Compile the skill automaton once, before the first request
+    get_skill_matcher()
+    
+    # Workers only start accepting requests once the model is warm
+    if MODEL_WARMUP and not warm_up_model():
+        print("Warning: Embedding model not ready, /ready will report 503")
+    
+    db = SessionLocal()
+    try:
+        ensure_job_index(db)
+        ensure_skill_stats(db)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ingestion_queue.shutdown()
+    shutdown_executors()
+    await github_verifier.aclose()
+    await dispose_async_engine()
+
 @app.get("/")
 def root():
     return {"status": "AI Hiring SaaS running", "version": "1.0.0"}
@@ -40,6 +73,17 @@ def health():
     """Health check endpoint"""
     return {"status": "ok", "message": "Backend is running"}
 
+@app.get("/ready")
+def ready(response: Response):
+    """Readiness probe, fails until the embedding model is loaded and warm"""
+    if MODEL_WARMUP and not model_status()["ready"]:
+        # e.g. the shared embedding worker came up after this process
+        warm_up_model()
+    state = model_status()
+    if MODEL_WARMUP and not state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state
+
 @app.get("/test-cors")
 def test_cors():
     """Test CORS is working"""
@@ -47,15 +91,44 @@ def test_cors():
 
 @app.websocket("/ws/analyze")
 async def analyze_ws(ws: WebSocket):
+    """Stream progress of a background rank-candidates upload.
+    
+    The ingestion token is passed as ``?token=`` and the recruiter's JWT as
+    ``?access_token=`` or an ``Authorization: Bearer`` header; either may
+    instead come in a first message ``{"token": "...", "access_token": "..."}``.
+    Every event so far is replayed, then new ones are pushed until the
+    upload finishes. Like GET /recruiter/ingestion/{token}, only the
+    recruiter who started the upload may watch it.
+    """
     await ws.accept()
-    steps = [
-        ("Parsing resume", 20),
-        ("Extracting skills", 40),
-        ("Semantic matching", 60),
-        ("Bias check", 80),
-        ("Finalizing result", 100),
-    ]
-    for step, prog in steps:
-        await ws.send_json({"step": step, "progress": prog})
-        await asyncio.sleep(1)
+    token = ws.query_params.get("token")
+    access_token = ws.query_params.get("access_token")
+    authorization = ws.headers.get("authorization", "")
+    if not access_token and authorization.lower().startswith("bearer "):
+        access_token = authorization[7:]
+    if not token or not access_token:
+        message = await ws.receive_json()
+        token = token or message.get("token")
+        access_token = access_token or message.get("access_token")
+    
+    try:
+        claims = decode_token(access_token) if access_token else None
+    except HTTPException:
+        claims = None
+    if not claims or claims.get("user_type") != "recruiter":
+        await ws.send_json({"error": "Not authenticated"})
+        await ws.close(code=1008)
+        return
+    
+    ingestion_job = await ingestion_queue.find(token) if token else None
+    if not ingestion_job or ingestion_job.recruiter_id != claims["sub"]:
+        await ws.send_json({"error": "Unknown ingestion token"})
+        await ws.close(code=1008)
+        return
+    
+    try:
+        async for event in ingestion_job.stream():
+            await ws.send_json(event)
+    except WebSocketDisconnect:
+        return
     await ws.close()
@@ -0,0 +1,145 @@
+# create_all only creates missing tables, it never alters existing ones.
+# Migrations upgrade older databases and are no-ops on fresh ones; applied
+# versions are recorded in the schema_version table.
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app.database import Base, SQLITE_BUSY_TIMEOUT_MS
+from app.models import compress_text
+
+# Seconds a worker waits for another one to finish migrating, and that a
+# migration may run, before startup fails
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", "600"))
+# pg_advisory_xact_lock key, any bigint not used by other advisory locks
+MIGRATION_LOCK_ID = 7265735
+
+def _add_column(conn, table, column, ddl):
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+def _create_index(conn, name, table, columns, unique=False):
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+    ))
+
+def resume_content_hash(conn):
+    _add_column(conn, "resumes", "content_hash", "VARCHAR")
+    _create_index(conn, "ix_resumes_content_hash", "resumes", "content_hash")
+
+def hot_path_indexes(conn):
+    _create_index(conn, "ix_job_matches_job_score", "job_matches", "job_id, match_score DESC")
+    _create_index(conn, "ix_job_matches_resume_id", "job_matches", "resume_id")
+    _create_index(conn, "ix_jobs_recruiter_id", "jobs", "recruiter_id")
+    _create_index(conn, "ix_jobs_is_active", "jobs", "is_active")
+    _create_index(conn, "ix_resumes_candidate_id", "resumes", "candidate_id")
+
+def unique_hiring_decision(conn):
+    # Keep only the most recent decision per (job, candidate) before enforcing uniqueness
+    conn.execute(text("""
+        DELETE FROM hiring_decisions WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY job_id, candidate_id ORDER BY updated_at DESC, id
+                ) AS rn FROM hiring_decisions
+            ) ranked WHERE rn = 1
+        )
+    """))
+    _create_index(conn, "uq_hiring_decisions_job_candidate", "hiring_decisions", "job_id, candidate_id", unique=True)
+
+def resume_chunk_embeddings(conn):
+    blob = "BYTEA" if conn.dialect.name == "postgresql" else "BLOB"
+    _add_column(conn, "resume_contents", "chunk_embeddings", blob)
+    _add_column(conn, "resume_contents", "chunk_model_name", "VARCHAR")
+
+def resume_full_text(conn, batch_size=500):
+    blob = "BYTEA" if conn.dialect.name == "postgresql" else "BLOB"
+    _add_column(conn, "resume_contents", "full_text", blob)
+    # Move existing texts to the compressed column
+    while True:
+        rows = conn.execute(text(
+            "SELECT content_hash, extracted_text FROM resume_contents "
+            "WHERE full_text IS NULL AND extracted_text IS NOT NULL LIMIT :n"
+        ), {"n": batch_size}).all()
+        if not rows:
+            break
+        conn.execute(
+            text("UPDATE resume_contents SET full_text = :t, extracted_text = NULL WHERE content_hash = :h"),
+            [{"t": compress_text(row.extracted_text), "h": row.content_hash} for row in rows]
+        )
+
+def reset_skill_indexes(conn):
+    # Postings written while compound skills were mapped to their first alias
+    # ("AWS Lambda" -> aws); ensure_job_index rebuilds them at startup
+    conn.execute(text("DELETE FROM job_recommendations"))
+    conn.execute(text("DELETE FROM candidate_skills"))
+    conn.execute(text("DELETE FROM job_skills"))
+
+# (version, description, function), append only
+MIGRATIONS = [
+    (1, "Add resumes.content_hash", resume_content_hash),
+    (2, "Indexes for hot query patterns", hot_path_indexes),
+    (3, "Unique hiring decision per job and candidate", unique_hiring_decision),
+    (4, "Add resume_contents chunk embeddings", resume_chunk_embeddings),
+    (5, "Compressed full resume text", resume_full_text),
+    (6, "Rebuild skill indexes with exact skill aliases", reset_skill_indexes),
+]
+
+def current_version(conn):
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+@contextmanager
+def _migration_lock(engine):
+    """Transaction holding a database-wide lock until it ends.
+    
+    Workers starting together would otherwise all read the same version
+    and apply the same migrations concurrently.
+    """
+    timeout_ms = MIGRATION_LOCK_TIMEOUT * 1000
+    if engine.dialect.name == "sqlite":
+        # pysqlite defers BEGIN to the first write; take the write lock up
+        # front instead, so the version check already runs under it
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={timeout_ms}")
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.exec_driver_sql("ROLLBACK")
+                    raise
+                conn.exec_driver_sql("COMMIT")
+            finally:
+                conn.exec_driver_sql(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        return
+    
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_ID})
+        yield conn
+
+def run_migrations(engine):
+    """Create missing tables, then apply pending migrations in order.
+    
+    Runs in one transaction under _migration_lock; a failing migration
+    rolls everything back and raises.
+    """
+    with _migration_lock(engine) as conn:
+        Base.metadata.create_all(bind=conn)
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        version = current_version(conn)
+        for number, description, migrate in MIGRATIONS:
+            if number <= version:
+                continue
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.utcnow()}
+            )
+            print(f"Applied migration {number}: {description}")
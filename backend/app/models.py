@@ -1,8 +1,30 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, Text, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+import os
+import zlib
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, Text, ForeignKey, JSON, LargeBinary, Index, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from app.database import Base
 
+TEXT_COMPRESSION_LEVEL = int(os.getenv("TEXT_COMPRESSION_LEVEL", "6"))
+
+def compress_text(value):
+    return zlib.compress(value.encode("utf-8"), TEXT_COMPRESSION_LEVEL)
+
+def decompress_text(data):
+    return zlib.decompress(data).decode("utf-8")
+
+class CompressedText(TypeDecorator):
+    """Text stored as zlib compressed UTF-8"""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return compress_text(value) if value is not None else None
+    
+    def process_result_value(self, value, dialect):
+        return decompress_text(value) if value is not None else None
+
 class User(Base):
     __tablename__ = "users"
     
@@ -26,10 +48,11 @@ class Resume(Base):
     __tablename__ = "resumes"
     
     id = Column(String, primary_key=True, index=True)
-    candidate_id = Column(String, ForeignKey("users.id"), nullable=False)
+    candidate_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
-    extracted_text = Column(Text, nullable=True)
+    content_hash = Column(String, ForeignKey("resume_contents.content_hash"), nullable=True, index=True)
+    extracted_text = deferred(Column(Text, nullable=True))  # first 1000 chars, the full text is in resume_contents
     skills = Column(JSON, nullable=True)  # List of extracted skills
     experience_years = Column(Integer, nullable=True)
     github_projects = Column(JSON, nullable=True)  # List of GitHub projects
@@ -40,19 +63,43 @@ class Resume(Base):
     # Relationships
     candidate = relationship("User", back_populates="resumes")
     matches = relationship("JobMatch", back_populates="resume")
+    content = relationship("ResumeContent", back_populates="resumes")
+
+class ResumeContent(Base):
+    __tablename__ = "resume_contents"
+    
+    content_hash = Column(String, primary_key=True, index=True)  # SHA-256 of the uploaded bytes
+    file_path = Column(String, nullable=False)
+    extracted_text = deferred(Column(Text, nullable=True))  # uncompressed text of rows older than full_text
+    full_text = deferred(Column(CompressedText, nullable=True))  # full extracted text, loaded on access
+    skills = Column(JSON, nullable=True)
+    embedding = Column(LargeBinary, nullable=True)  # float32 vector bytes
+    model_name = Column(String, nullable=True)  # model that produced the embedding
+    chunk_embeddings = Column(LargeBinary, nullable=True)  # .npy bytes, one row per text chunk
+    chunk_model_name = Column(String, nullable=True)  # model and chunking that produced them
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    resumes = relationship("Resume", back_populates="content")
+    
+    @property
+    def text(self):
+        if self.full_text is not None:
+            return self.full_text
+        return self.extracted_text or ""
 
 class Job(Base):
     __tablename__ = "jobs"
     
     id = Column(String, primary_key=True, index=True)
-    recruiter_id = Column(String, ForeignKey("users.id"), nullable=False)
+    recruiter_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     required_skills = Column(JSON, nullable=True)  # List of required skills
     experience_level = Column(String, nullable=True)  # "entry", "mid", "senior"
     salary_range = Column(String, nullable=True)
     location = Column(String, nullable=True)
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -60,13 +107,52 @@ class Job(Base):
     recruiter = relationship("User", back_populates="jobs")
     matches = relationship("JobMatch", back_populates="job")
     decisions = relationship("HiringDecision", back_populates="job")
+    embedding = relationship("JobEmbedding", back_populates="job", uselist=False)
+
+class JobEmbedding(Base):
+    __tablename__ = "job_embeddings"
+    
+    job_id = Column(String, ForeignKey("jobs.id"), primary_key=True, index=True)
+    content_hash = Column(String, nullable=False)  # SHA-256 of the description that was encoded
+    model_name = Column(String, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # float32 vector bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    job = relationship("Job", back_populates="embedding")
+
+class JobSkill(Base):
+    __tablename__ = "job_skills"
+    
+    # Inverted index: normalized skill -> jobs requiring it
+    job_id = Column(String, ForeignKey("jobs.id"), primary_key=True)
+    skill = Column(String, primary_key=True, index=True)  # lowercase canonical skill
+
+class CandidateSkill(Base):
+    __tablename__ = "candidate_skills"
+    
+    # Skills of the candidate's primary resume, same normalization as JobSkill
+    candidate_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    skill = Column(String, primary_key=True, index=True)
+
+class JobRecommendation(Base):
+    __tablename__ = "job_recommendations"
+    
+    candidate_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    job_id = Column(String, ForeignKey("jobs.id"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)  # 0-100, share of required skills covered
+    
+    __table_args__ = (
+        Index("ix_job_recommendations_candidate_score", "candidate_id", "score"),
+    )
 
 class JobMatch(Base):
     __tablename__ = "job_matches"
     
     id = Column(String, primary_key=True, index=True)
     job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
-    resume_id = Column(String, ForeignKey("resumes.id"), nullable=False)
+    resume_id = Column(String, ForeignKey("resumes.id"), nullable=False, index=True)
     match_score = Column(Float, nullable=False)  # 0-100
     matched_skills = Column(JSON, nullable=True)
     missing_skills = Column(JSON, nullable=True)
@@ -78,6 +164,19 @@ class JobMatch(Base):
     # Relationships
     job = relationship("Job", back_populates="matches")
     resume = relationship("Resume", back_populates="matches")
+    
+    __table_args__ = (
+        # Serves "candidates of a job by score" as an index range scan
+        Index("ix_job_matches_job_score", "job_id", text("match_score DESC")),
+    )
+
+class JobSkillStat(Base):
+    __tablename__ = "job_skill_stats"
+    
+    # Materialized count of matches per matched skill, maintained as matches are written
+    job_id = Column(String, ForeignKey("jobs.id"), primary_key=True)
+    skill = Column(String, primary_key=True)
+    match_count = Column(Integer, nullable=False, default=0)
 
 class HiringDecision(Base):
     __tablename__ = "hiring_decisions"
@@ -95,3 +194,31 @@ class HiringDecision(Base):
     # Relationships
     job = relationship("Job", back_populates="decisions")
     recruiter = relationship("User", back_populates="decisions_created", foreign_keys=[created_by])
+    
+    __table_args__ = (
+        # One decision per candidate and job, makes decisions a single upsert
+        Index("uq_hiring_decisions_job_candidate", "job_id", "candidate_id", unique=True),
+    )
+
+# Progress of background rank-candidates uploads, so every worker process
+# can report and stream an upload whichever one is processing it
+class IngestionState(Base):
+    __tablename__ = "ingestion_jobs"
+    
+    token = Column(String, primary_key=True)
+    job_id = Column(String, nullable=False)  # not a foreign key, jobs may be deleted meanwhile
+    recruiter_id = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # "queued", "running", "completed", "failed"
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    results = Column(JSON, nullable=True)  # result payloads so far
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class IngestionEvent(Base):
+    __tablename__ = "ingestion_events"
+    
+    token = Column(String, ForeignKey("ingestion_jobs.token"), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # publishing order
+    payload = Column(JSON, nullable=False)
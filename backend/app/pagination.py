@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(v) if col.type.python_type is datetime else col.type.python_type(v)
+            for v, (col, _) in zip(values, columns)
+        ]
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _after(columns, values):
+    """WHERE clause selecting rows strictly after ``values`` in the sort order"""
+    clauses = []
+    for i, (col, descending) in enumerate(columns):
+        equal = [c == v for (c, _), v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, col < values[i] if descending else col > values[i]))
+    return or_(*clauses)
+
+def keyset(query, columns, cursor=None):
+    """Order ``query`` by ``columns`` ((column, descending) pairs) and seek past ``cursor``"""
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns)))
+    return query.order_by(*[col.desc() if descending else col.asc() for col, descending in columns])
+
+def _page(rows, columns, limit):
+    """Trim the look-ahead row; returns (rows, next cursor or None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, col.key) for col, _ in columns])
+
+async def keyset_fetch(session, stmt, columns, cursor, limit):
+    """Fetch one page of a select() on an AsyncSession, returns (rows, next cursor).
+    
+    With ``limit`` None every row after ``cursor`` is returned and there is
+    no next cursor.
+    """
+    if limit is None:
+        result = await session.scalars(keyset(stmt, columns, cursor))
+        return result.all(), None
+    result = await session.scalars(keyset(stmt, columns, cursor).limit(limit + 1))
+    return _page(result.all(), columns, limit)
+
+def set_next_cursor(response: Response, next_cursor):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+def ndjson_stream(session_factory, build_query, serialize):
+    """Stream rows as newline-delimited JSON straight from a server-side cursor.
+    
+    The generator owns its session because the request-scoped one may be
+    closed before the body has been sent.
+    """
+    def generate():
+        db = session_factory()
+        try:
+            query = build_query(db).yield_per(STREAM_BATCH_SIZE)
+            for row in query:
+                yield serialize(row) + "\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
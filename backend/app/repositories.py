@@ -0,0 +1,132 @@
+# Async data access for the request handlers.
+#
+# Every function takes an AsyncSession, so queries are awaited instead of
+# blocking the event loop. Sync service helpers (skill indexes, analytics)
+# are reused through AsyncSession.run_sync.
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.database import dialect_insert
+from app.models import User, Job, Resume, JobMatch, HiringDecision
+from app.pagination import keyset_fetch
+from app.services.analytics import recruiter_analytics
+from app.services.job_index import index_job, index_candidate, recommended_jobs
+
+JOB_ORDER = [(Job.created_at, True), (Job.id, True)]
+RESUME_ORDER = [(Resume.created_at, True), (Resume.id, True)]
+MATCH_ORDER = [(JobMatch.match_score, True), (JobMatch.id, False)]
+
+# ===================== USERS =====================
+
+async def get_user(session, user_id):
+    return await session.get(User, user_id)
+
+async def get_user_by_email(session, email):
+    return await session.scalar(select(User).where(User.email == email))
+
+async def find_user(session, email, username):
+    """User registered with either the email or the username"""
+    return await session.scalar(
+        select(User).where((User.email == email) | (User.username == username)).limit(1)
+    )
+
+async def add_user(session, user):
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+# ===================== JOBS =====================
+
+async def get_job(session, job_id):
+    return await session.get(Job, job_id)
+
+async def get_recruiter_job(session, job_id, recruiter_id):
+    """Job owned by the recruiter, or None"""
+    return await session.scalar(
+        select(Job).where(Job.id == job_id, Job.recruiter_id == recruiter_id)
+    )
+
+async def list_recruiter_jobs(session, recruiter_id, cursor, limit):
+    """Page of a recruiter's jobs, newest first. Returns (jobs, next cursor)"""
+    stmt = select(Job).where(Job.recruiter_id == recruiter_id)
+    return await keyset_fetch(session, stmt, JOB_ORDER, cursor, limit)
+
+async def save_job(session, job):
+    """Insert or update a job and refresh its skill index rows"""
+    session.add(job)
+    await session.run_sync(index_job, job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+async def get_recommended_jobs(session, candidate_id, limit, offset=0):
+    return await session.run_sync(recommended_jobs, candidate_id, limit, offset)
+
+async def get_recruiter_analytics(session, recruiter_id):
+    return await session.run_sync(recruiter_analytics, recruiter_id)
+
+# ===================== RESUMES =====================
+
+async def add_resume(session, resume):
+    """Store a resume and make it the source of its owner's job recommendations"""
+    session.add(resume)
+    await session.run_sync(index_candidate, resume.candidate_id, resume.skills)
+    await session.commit()
+    await session.refresh(resume)
+    return resume
+
+async def get_resumes(session, resume_ids):
+    """Resumes by id, as a dict"""
+    if not resume_ids:
+        return {}
+    result = await session.scalars(select(Resume).where(Resume.id.in_(resume_ids)))
+    return {resume.id: resume for resume in result}
+
+async def list_candidate_resumes(session, candidate_id, cursor, limit):
+    """Page of a candidate's resumes, newest first. Returns (resumes, next cursor)"""
+    stmt = select(Resume).where(Resume.candidate_id == candidate_id)
+    return await keyset_fetch(session, stmt, RESUME_ORDER, cursor, limit)
+
+# ===================== JOB MATCHES =====================
+
+def job_matches_query(db, job_id):
+    """Sync query over a job's matches, for streaming exports"""
+    return db.query(JobMatch).filter(JobMatch.job_id == job_id)
+
+async def list_job_matches(session, job_id, cursor, limit):
+    """Page of a job's matches, best score first. Returns (matches, next cursor)"""
+    stmt = select(JobMatch).where(JobMatch.job_id == job_id)
+    return await keyset_fetch(session, stmt, MATCH_ORDER, cursor, limit)
+
+# ===================== HIRING DECISIONS =====================
+
+async def upsert_hiring_decision(session, job_id, candidate_id, status, feedback, created_by):
+    """Insert or update the single decision for a job and candidate"""
+    now = datetime.utcnow()
+    insert = dialect_insert(session)
+    stmt = insert(HiringDecision).values(
+        id=str(uuid.uuid4()),
+        job_id=job_id,
+        candidate_id=candidate_id,
+        status=status,
+        feedback=feedback,
+        created_by=created_by,
+        created_at=now,
+        updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HiringDecision.job_id, HiringDecision.candidate_id],
+        set_={
+            "status": stmt.excluded.status,
+            "feedback": stmt.excluded.feedback,
+            "updated_at": stmt.excluded.updated_at
+        }
+    ).returning(HiringDecision)
+    result = await session.scalars(stmt, execution_options={"populate_existing": True})
+    decision = result.one()
+    await session.commit()
+    return decision
@@ -86,15 +86,26 @@ class JobMatchResponse(BaseModel):
     matched_skills: Optional[List[str]]
     missing_skills: Optional[List[str]]
     bias_risk_level: Optional[str]
-    bias_findings: Optional[List[dict]]
+    bias_findings: Optional[List[str]]
     projects_verified: int
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ResumeSearchResult(BaseModel):
+    resume_id: str
+    candidate_id: str
+    filename: str
+    skills: Optional[List[str]]
+    score: float
+
+class RescoreRequest(BaseModel):
+    resume_ids: List[str]
+
 # Hiring Decision Schemas
 class HiringDecisionCreate(BaseModel):
+    job_id: str
     candidate_id: str
     status: str
     feedback: Optional[str] = None
@@ -1,22 +1,170 @@
 from sentence_transformers import SentenceTransformer
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from app.services.bias_checker import detect_bias
+from app.services.skill_matcher import extract_skills
+from functools import lru_cache
+import httpx
+import numpy as np
+import os
 import re
 
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Number of resume texts sent to the encoder per forward pass
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+
+# Load and warm the model at startup instead of on the first request
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+
+# Shared embedding worker (app.embedding_worker); when set, API workers do
+# not load the model themselves
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL")
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "30"))
+
+# Encoder implementation:
+#   torch  - SentenceTransformer on PyTorch
+#   onnx   - SentenceTransformer on ONNX Runtime, int8-quantized by default
+#            (needs sentence-transformers[onnx]; fails at startup without it)
+#   remote - the shared embedding worker at EMBEDDING_SERVICE_URL
+#   simple - no model, keyword scoring via keyword_similarity_scores
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "remote" if EMBEDDING_SERVICE_URL else "torch")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "onnx/model_quint8_avx2.onnx")
+
+# Tag stored with every vector; quantized vectors are not mixed with fp32 ones
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID") or (
+    f"{MODEL_NAME}@{os.path.splitext(os.path.basename(ONNX_MODEL_FILE))[0]}"
+    if EMBEDDING_BACKEND == "onnx" else MODEL_NAME
+)
+
+class RemoteEncoder:
+    """Client for the embedding worker, with the encode() signature of SentenceTransformer"""
+    
+    def __init__(self, url, timeout=EMBEDDING_SERVICE_TIMEOUT):
+        self.client = httpx.Client(base_url=url, timeout=timeout)
+    
+    def encode(self, texts, batch_size=None, normalize_embeddings=False):
+        response = self.client.post("/embed", json={
+            "texts": list(texts),
+            "batch_size": batch_size,
+            "normalize": normalize_embeddings
+        })
+        response.raise_for_status()
+        # Vectors stored by one model must not be compared with another's
+        if response.headers.get("X-Model-Name") != EMBEDDING_MODEL_ID:
+            raise RuntimeError(
+                f"Embedding worker serves {response.headers.get('X-Model-Name')}, expected {EMBEDDING_MODEL_ID}"
+            )
+        rows, dim = (int(n) for n in response.headers["X-Embedding-Shape"].split(","))
+        return np.frombuffer(response.content, dtype=np.float32).reshape(rows, dim)
+
+# Chunked scoring: long resumes and JDs are split into sections that fit the
+# encoder's 256 word-piece window and the section similarities are aggregated
+MATCH_CHUNKING = os.getenv("MATCH_CHUNKING", "false").lower() == "true"
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "150"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "30"))
+CHUNK_AGGREGATION = os.getenv("CHUNK_AGGREGATION", "max")  # max | mean | topk
+CHUNK_TOP_K = int(os.getenv("CHUNK_TOP_K", "3"))
+
+# Tag stored with chunk matrices, they depend on the chunking as well as the model
+CHUNK_MODEL_ID = f"{EMBEDDING_MODEL_ID}#{CHUNK_WORDS}/{CHUNK_OVERLAP}"
+
+# ONNX model files built for one instruction set, by file name fragment and
+# the /proc/cpuinfo flag the CPU needs for it
+ONNX_CPU_FLAGS = {"avx512_vnni": "avx512_vnni", "avx512": "avx512f", "avx2": "avx2"}
+
 # Lazy load model
 _model = None
+_model_error = None
+_model_ready = False
+
+def cpu_flags():
+    """Feature flags of the CPU, None where /proc/cpuinfo is not available"""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return None
+
+def check_onnx_model_file(file_name=ONNX_MODEL_FILE):
+    """Raise if the ONNX model file is built for an instruction set this CPU lacks"""
+    flags = cpu_flags()
+    name = os.path.basename(file_name)
+    for fragment, flag in ONNX_CPU_FLAGS.items():
+        if fragment in name:
+            if flags is not None and flag not in flags:
+                raise RuntimeError(
+                    f"{file_name} needs a CPU with {flag.upper()}, this host has none; "
+                    f"set ONNX_MODEL_FILE to a model for this CPU, e.g. onnx/model.onnx"
+                )
+            return
+
+def load_local_model():
+    """In-process encoder for the configured backend.
+    
+    The torch backend returns None when the model cannot be loaded and
+    scoring falls back to keywords. The onnx backend raises instead: it is
+    only ever chosen on purpose, so keyword scores would be a silent
+    downgrade.
+    """
+    if EMBEDDING_BACKEND == "onnx":
+        check_onnx_model_file()
+        try:
+            return SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE})
+        except Exception as e:
+            raise RuntimeError(
+                f"ONNX embedding backend unavailable ({e}); install sentence-transformers[onnx] "
+                f"or set EMBEDDING_BACKEND=torch"
+            ) from e
+    if EMBEDDING_BACKEND != "torch":
+        raise ValueError(f"Unknown embedding backend: {EMBEDDING_BACKEND}")
+    try:
+        return SentenceTransformer(MODEL_NAME)
+    except Exception as e:
+        print(f"Warning: Could not load SentenceTransformer model: {e}")
+        print("Using fallback simple matching...")
+        return None
 
 def get_model():
-    global _model
-    if _model is None:
+    global _model, _model_error
+    if _model_error is not None:
+        # Loading is not retried on every request
+        raise _model_error
+    if _model is None and EMBEDDING_BACKEND != "simple":
         try:
-            _model = SentenceTransformer("all-MiniLM-L6-v2")
+            _model = RemoteEncoder(EMBEDDING_SERVICE_URL) if EMBEDDING_BACKEND == "remote" else load_local_model()
         except Exception as e:
-            print(f"Warning: Could not load SentenceTransformer model: {e}")
-            print("Using fallback simple matching...")
-            _model = None
+            _model_error = e
+            raise
     return _model
 
+def warm_up_model():
+    """Load the encoder and run one dummy encode so the first request is fast"""
+    global _model_ready
+    if EMBEDDING_BACKEND == "simple":
+        _model_ready = True
+        return True
+    model = get_model()
+    if model is None:
+        return False
+    try:
+        model.encode(["warm up"], normalize_embeddings=True)
+    except Exception as e:
+        print(f"Warning: Model warm-up failed: {e}")
+        return False
+    _model_ready = True
+    return True
+
+def model_status():
+    return {
+        "model_name": EMBEDDING_MODEL_ID,
+        "backend": EMBEDDING_BACKEND,
+        "ready": _model_ready
+    }
+
 SKILLS = ["Python","Machine Learning","NLP","SQL","Docker","AWS"]
 
 def extract_years_of_experience(text):
@@ -40,24 +188,73 @@ def extract_years_of_experience(text):
     count = sum(1 for kw in job_keywords if kw.lower() in text.lower())
     return max(1, count // 2)
 
+# Distinct job descriptions whose fallback features are kept in memory
+FALLBACK_JD_CACHE_SIZE = int(os.getenv("FALLBACK_JD_CACHE_SIZE", "128"))
+
+def _words(text):
+    return text.lower().split()
+
+# Binary bag-of-words hashed into a fixed space, so nothing has to be fitted
+# or stored; with l2 norm the dot product is the cosine of the word sets
+_word_vectorizer = HashingVectorizer(
+    n_features=2 ** 18, analyzer=_words, binary=True, norm="l2", alternate_sign=False, dtype=np.float32
+)
+_skill_index = {skill: i for i, skill in enumerate(SKILLS)}
+
+def _skill_indicators(skill_lists):
+    """(len(skill_lists), len(SKILLS)) 0/1 matrix of the tracked skills in each list"""
+    indicators = np.zeros((len(skill_lists), len(SKILLS)), dtype=np.float32)
+    for row, skills in enumerate(skill_lists):
+        indicators[row, [_skill_index[s] for s in skills if s in _skill_index]] = 1
+    return indicators
+
+@lru_cache(maxsize=FALLBACK_JD_CACHE_SIZE)
+def _jd_features(jd):
+    """Word vector and skill indicators of a job description, built once per JD"""
+    return _word_vectorizer.transform([jd]), _skill_indicators([extract_skills(jd)])[0]
+
+def keyword_similarity_scores(resume_texts, jd, resume_skills=None):
+    """Model-free scores for a batch of resumes against one job description.
+    
+    Half of the score is the share of SKILLS found in both texts, half the
+    word overlap, taken for the whole batch from one sparse matrix-vector
+    product of hashed word vectors. ``resume_skills`` may pass skills that
+    were already extracted.
+    """
+    if not resume_texts:
+        return []
+    if resume_skills is None:
+        resume_skills = [extract_skills(text) for text in resume_texts]
+    jd_words, jd_skills = _jd_features(jd or "")
+    overlap = (_word_vectorizer.transform(resume_texts) @ jd_words.T).toarray().ravel()
+    matched = _skill_indicators(resume_skills) @ jd_skills
+    scores = np.minimum(100, matched / len(SKILLS) * 50 + overlap * 50)
+    return [round(float(s), 2) for s in scores]
+
 def simple_match_score(resume, jd):
     """Simple fallback matching without ML model"""
-    resume_lower = resume.lower()
-    jd_lower = jd.lower()
-    
-    # Count skill matches
-    matched = sum(1 for skill in SKILLS if skill.lower() in resume_lower and skill.lower() in jd_lower)
-    total = len(SKILLS)
-    
-    # Count keyword overlap
-    resume_words = set(resume_lower.split())
-    jd_words = set(jd_lower.split())
-    overlap = len(resume_words & jd_words) / len(resume_words | jd_words) if (resume_words | jd_words) else 0
+    return keyword_similarity_scores([resume], jd)[0]
+
+def build_match_result(resume, score, skills=None):
+    """Assemble the match payload shared by single and batch scoring"""
+    resume_skills = set(extract_skills(resume) if skills is None else skills)
+    found = [s for s in SKILLS if s in resume_skills]
+    missing = [s for s in SKILLS if s not in found]
+    years = extract_years_of_experience(resume)
     
-    score = (matched / total * 50) + (overlap * 50)
-    return min(100, score)
+    return {
+        "match_score": score,
+        "matched_skills": found,
+        "missing_skills": missing,
+        "experience_years": years,
+        "bias_flags": detect_bias(resume),
+        "recommendations": [f"Add project in {s}" for s in missing],
+        "explanation": "AI semantic and skill-based evaluation completed."
+    }
 
 def calculate_match(resume, jd):
+    if MATCH_CHUNKING:
+        return calculate_match_batch([resume], jd)[0]
     try:
         model = get_model()
         if model:
@@ -70,24 +267,179 @@ def calculate_match(resume, jd):
         print(f"Error calculating match: {e}")
         score = simple_match_score(resume, jd)
     
-    found = [s for s in SKILLS if s.lower() in resume.lower()]
-    missing = [s for s in SKILLS if s not in found]
-    years = extract_years_of_experience(resume)
+    return build_match_result(resume, score)
+
+def embed_texts(texts, batch_size=None):
+    """Encode texts into L2-normalized float32 vectors.
     
-    return {
-        "match_score": score,
-        "matched_skills": found,
-        "missing_skills": missing,
-        "experience_years": years,
-        "bias_flags": detect_bias(resume),
-        "recommendations": [f"Add project in {s}" for s in missing],
-        "explanation": "AI semantic and skill-based evaluation completed."
-    }
+    Returns None when the model is unavailable so callers can fall back.
+    """
+    model = get_model()
+    if model is None:
+        return None
+    embs = model.encode(
+        list(texts),
+        batch_size=batch_size or EMBED_BATCH_SIZE,
+        normalize_embeddings=True
+    )
+    return np.asarray(embs, dtype=np.float32)
+
+def batch_similarity_scores(resume_texts, jd, batch_size=None, jd_embedding=None, resume_embeddings=None,
+                            resume_skills=None):
+    """Score many resumes against one job description.
+    
+    The job description is embedded once (or taken from ``jd_embedding``),
+    resumes are encoded in mini-batches of ``batch_size`` unless precomputed
+    ``resume_embeddings`` are given, and all cosine scores come from a single
+    matrix-vector product. Returns a list of scores in the 0-100 range, in
+    input order.
+    """
+    if not resume_texts:
+        return []
+    
+    try:
+        if jd_embedding is None:
+            jd_embs = embed_texts([jd])
+            jd_embedding = jd_embs[0] if jd_embs is not None else None
+        if jd_embedding is not None:
+            resume_embs = resume_embeddings
+            if resume_embs is None:
+                resume_embs = embed_texts(resume_texts, batch_size=batch_size)
+            if resume_embs is not None:
+                scores = resume_embs @ np.asarray(jd_embedding, dtype=np.float32)
+                return [round(float(s) * 100, 2) for s in scores]
+    except Exception as e:
+        print(f"Error calculating batch match: {e}")
+    
+    return keyword_similarity_scores(resume_texts, jd, resume_skills)
+
+def chunk_text(text, max_words=None, overlap=None):
+    """Split text into sections of at most ``max_words`` words.
+    
+    Paragraphs are packed together while they fit; a longer paragraph is cut
+    into windows that overlap by ``overlap`` words. Always returns at least
+    one chunk.
+    """
+    max_words = max_words or CHUNK_WORDS
+    step = max(1, max_words - (CHUNK_OVERLAP if overlap is None else overlap))
+    chunks = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        words = paragraph.split()
+        if len(current) + len(words) <= max_words:
+            current.extend(words)
+            continue
+        if current:
+            chunks.append(" ".join(current))
+        while len(words) > max_words:
+            chunks.append(" ".join(words[:max_words]))
+            words = words[step:]
+        current = words
+    if current or not chunks:
+        chunks.append(" ".join(current))
+    return chunks
+
+def embed_chunks(texts, batch_size=None):
+    """Chunk every text and encode all chunks in one batch.
+    
+    Returns a list with one (n_chunks, dim) matrix per text, or None when
+    the model is unavailable.
+    """
+    pieces = [chunk_text(t) for t in texts]
+    embs = embed_texts([c for chunks in pieces for c in chunks], batch_size=batch_size)
+    if embs is None:
+        return None
+    return np.split(embs, np.cumsum([len(chunks) for chunks in pieces])[:-1])
+
+def aggregate_chunk_scores(chunk_scores, counts, how=None, top_k=None):
+    """Reduce per-chunk similarities to one score per document.
+    
+    ``chunk_scores`` holds the chunks of every document back to back, with
+    ``counts[i]`` chunks for document i. The scores are scattered into a
+    padded (documents, max chunks) matrix so max, mean and top-k mean are
+    single NumPy reductions.
+    """
+    how = how or CHUNK_AGGREGATION
+    counts = np.asarray(counts)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    cols = np.arange(len(chunk_scores)) - np.repeat(np.cumsum(counts) - counts, counts)
+    padded = np.full((len(counts), max(int(counts.max(initial=0)), 1)), -np.inf, dtype=np.float32)
+    padded[rows, cols] = chunk_scores
+    
+    if how == "max":
+        return padded.max(axis=1)
+    if how == "mean":
+        return np.where(np.isfinite(padded), padded, 0).sum(axis=1) / np.maximum(counts, 1)
+    if how == "topk":
+        k = min(top_k or CHUNK_TOP_K, padded.shape[1])
+        top = np.partition(padded, padded.shape[1] - k, axis=1)[:, -k:]
+        valid = np.isfinite(top)
+        return np.where(valid, top, 0).sum(axis=1) / np.maximum(valid.sum(axis=1), 1)
+    raise ValueError(f"Unknown chunk aggregation: {how}")
+
+def chunked_similarity_scores(resume_texts, jd, batch_size=None, jd_chunks=None, resume_chunks=None,
+                              resume_skills=None):
+    """Chunk-aware counterpart of batch_similarity_scores.
+    
+    Each resume chunk is scored against its best matching JD chunk and the
+    chunk scores are aggregated per resume with CHUNK_AGGREGATION. Chunks
+    not passed in (``jd_chunks`` matrix, ``resume_chunks`` list of
+    matrices) are encoded together in one batch.
+    """
+    if not resume_texts:
+        return []
+    
+    try:
+        texts = ([] if resume_chunks is not None else list(resume_texts)) + ([] if jd_chunks is not None else [jd])
+        encoded = embed_chunks(texts, batch_size=batch_size) if texts else []
+        if encoded is not None:
+            if resume_chunks is None:
+                resume_chunks, encoded = encoded[:len(resume_texts)], encoded[len(resume_texts):]
+            if jd_chunks is None:
+                jd_chunks = encoded[0]
+            chunk_matrix = np.concatenate(resume_chunks)
+            chunk_scores = (chunk_matrix @ np.asarray(jd_chunks, dtype=np.float32).T).max(axis=1)
+            scores = aggregate_chunk_scores(chunk_scores, [len(m) for m in resume_chunks])
+            return [round(float(s) * 100, 2) for s in scores]
+    except Exception as e:
+        print(f"Error calculating chunked match: {e}")
+    
+    return keyword_similarity_scores(resume_texts, jd, resume_skills)
+
+def calculate_match_batch(resume_texts, jd, batch_size=None, jd_embedding=None, resume_embeddings=None,
+                          jd_chunks=None, resume_chunks=None):
+    """Batch counterpart of calculate_match, results are in input order.
+    
+    With MATCH_CHUNKING the chunk matrices are used instead of the
+    whole-document embeddings.
+    """
+    # Skills are extracted once and shared by the fallback scorer and the payload
+    resume_skills = [extract_skills(text) for text in resume_texts]
+    if MATCH_CHUNKING:
+        scores = chunked_similarity_scores(
+            resume_texts, jd,
+            batch_size=batch_size,
+            jd_chunks=jd_chunks,
+            resume_chunks=resume_chunks,
+            resume_skills=resume_skills
+        )
+    else:
+        scores = batch_similarity_scores(
+            resume_texts, jd,
+            batch_size=batch_size,
+            jd_embedding=jd_embedding,
+            resume_embeddings=resume_embeddings,
+            resume_skills=resume_skills
+        )
+    return [
+        build_match_result(text, score, skills)
+        for text, score, skills in zip(resume_texts, scores, resume_skills)
+    ]
 
-def rank_resumes(resumes, jd):
-    res = []
-    for name, text in resumes:
-        r = calculate_match(text, jd)
+def rank_resumes(resumes, jd, batch_size=None):
+    names = [name for name, _ in resumes]
+    texts = [text for _, text in resumes]
+    res = calculate_match_batch(texts, jd, batch_size=batch_size)
+    for name, r in zip(names, res):
         r["candidate"] = name
-        res.append(r)
     return sorted(res, key=lambda x: x["match_score"], reverse=True)
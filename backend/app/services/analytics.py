@@ -0,0 +1,94 @@
+from collections import Counter
+from sqlalchemy import bindparam, case, func, update
+from app.database import dialect_insert
+from app.models import Job, JobMatch, JobSkillStat, HiringDecision
+
+FUNNEL_STAGES = ["applied", "shortlisted", "rejected", "offered", "hired"]
+TOP_SKILLS_LIMIT = 5
+
+def record_matched_skills(db, job_id, skill_lists):
+    """Add newly written matches to job_skill_stats, before committing"""
+    add_skill_counts(db, job_id, Counter(skill for skills in skill_lists for skill in set(skills or [])))
+
+def add_skill_counts(db, job_id, counts):
+    """Upsert a skill -> match count Counter into job_skill_stats"""
+    if not counts:
+        return
+    
+    insert = dialect_insert(db)
+    stmt = insert(JobSkillStat).values([
+        {"job_id": job_id, "skill": skill, "match_count": count}
+        for skill, count in counts.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[JobSkillStat.job_id, JobSkillStat.skill],
+        set_={"match_count": JobSkillStat.match_count + stmt.excluded.match_count}
+    )
+    db.execute(stmt)
+
+def forget_matched_skills(db, job_id, skill_lists):
+    """Take deleted matches out of job_skill_stats, before committing"""
+    counts = Counter(skill for skills in skill_lists for skill in set(skills or []))
+    if not counts:
+        return
+    
+    stats = JobSkillStat.__table__
+    db.connection().execute(
+        update(stats).where(
+            stats.c.job_id == job_id, stats.c.skill == bindparam("stat_skill")
+        ).values(match_count=stats.c.match_count - bindparam("stat_count")),
+        [{"stat_skill": skill, "stat_count": count} for skill, count in counts.items()]
+    )
+    db.query(JobSkillStat).filter(
+        JobSkillStat.job_id == job_id, JobSkillStat.match_count <= 0
+    ).delete(synchronize_session=False)
+
+def recruiter_analytics(db, recruiter_id):
+    """Dashboard numbers computed with aggregate queries"""
+    total_jobs = db.query(func.count(Job.id)).filter(Job.recruiter_id == recruiter_id).scalar()
+    
+    total_candidates, avg_score, bias_alerts = db.query(
+        func.count(JobMatch.id),
+        func.avg(JobMatch.match_score),
+        func.sum(case((JobMatch.bias_risk_level == "High", 1), else_=0))
+    ).join(Job, Job.id == JobMatch.job_id).filter(Job.recruiter_id == recruiter_id).one()
+    
+    funnel = dict.fromkeys(FUNNEL_STAGES, 0)
+    funnel.update(db.query(HiringDecision.status, func.count(HiringDecision.id)).join(
+        Job, Job.id == HiringDecision.job_id
+    ).filter(
+        Job.recruiter_id == recruiter_id, HiringDecision.status.in_(FUNNEL_STAGES)
+    ).group_by(HiringDecision.status).all())
+    
+    top_skills = db.query(JobSkillStat.skill).join(
+        Job, Job.id == JobSkillStat.job_id
+    ).filter(
+        Job.recruiter_id == recruiter_id
+    ).group_by(JobSkillStat.skill).order_by(
+        func.sum(JobSkillStat.match_count).desc(), JobSkillStat.skill
+    ).limit(TOP_SKILLS_LIMIT).all()
+    
+    return {
+        "total_jobs": total_jobs or 0,
+        "total_candidates": total_candidates or 0,
+        "average_match_score": round(float(avg_score or 0), 2),
+        "hiring_funnel": funnel,
+        "bias_alerts": int(bias_alerts or 0),
+        "top_skills": [skill for (skill,) in top_skills]
+    }
+
+def rebuild_skill_stats(db):
+    """Recount job_skill_stats from job_matches, streaming only the skills column"""
+    db.query(JobSkillStat).delete(synchronize_session=False)
+    counts = {}  # job_id -> Counter, only the totals are kept while streaming
+    rows = db.query(JobMatch.job_id, JobMatch.matched_skills).yield_per(1000)
+    for job_id, skills in rows:
+        counts.setdefault(job_id, Counter()).update(set(skills or []))
+    for job_id, job_counts in counts.items():
+        add_skill_counts(db, job_id, job_counts)
+    db.commit()
+
+def ensure_skill_stats(db):
+    """Build job_skill_stats once for databases created before it existed"""
+    if db.query(JobSkillStat).first() is None and db.query(JobMatch).first() is not None:
+        rebuild_skill_stats(db)
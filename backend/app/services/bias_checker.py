@@ -1,12 +1,24 @@
+import re
+
 BIAS = ["male","female","iit","nit","young","old"]
 
+# For a handful of terms a plain substring test is the cheapest scan; the
+# word boundary regex only runs for terms that occur at all. skill_matcher's
+# automaton only pays off for large term sets.
+_BIAS_PATTERNS = {b: re.compile(r"\b" + re.escape(b) + r"\b") for b in BIAS}
+
 def detect_bias(text):
-    return [b for b in BIAS if b in text.lower()]
+    """Bias terms found in text on word boundaries, in BIAS order"""
+    lowered = (text or "").lower()
+    return [b for b in BIAS if b in lowered and _BIAS_PATTERNS[b].search(lowered)]
 
-def check_bias(jd_text, resume_text):
-    """Check for bias in job description against resume"""
+def check_bias(jd_text):
+    """Check for bias in job description.
+    
+    The result only depends on the job description, so a batch of resumes
+    needs a single call.
+    """
     jd_bias = detect_bias(jd_text)
-    resume_bias = detect_bias(resume_text)
     
     risk_level = "Low"
     if len(jd_bias) >= 2:
@@ -0,0 +1,39 @@
+import os
+from app.database import dialect_insert
+
+# Rows per INSERT ... VALUES batch and per transaction
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+def _insert_rows(db, model, rows, ignore_conflicts, on_chunk):
+    stmt = dialect_insert(db)(model)
+    if ignore_conflicts:
+        stmt = stmt.on_conflict_do_nothing()
+    db.execute(stmt, rows)
+    if on_chunk:
+        on_chunk(db, rows)
+    db.commit()
+
+def bulk_insert(db, model, rows, chunk_size=None, ignore_conflicts=False, on_chunk=None):
+    """Insert plain dict rows with executemany, committing chunk by chunk.
+    
+    This skips the ORM unit of work entirely. If a chunk fails it is rolled
+    back and retried row by row, so one bad row only loses itself. ``on_chunk``
+    runs inside each chunk's transaction with the rows that are about to be
+    committed. Returns a list of (row, error) for rows that could not be
+    written.
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    failed = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            _insert_rows(db, model, chunk, ignore_conflicts, on_chunk)
+        except Exception:
+            db.rollback()
+            for row in chunk:
+                try:
+                    _insert_rows(db, model, [row], ignore_conflicts, on_chunk)
+                except Exception as e:
+                    db.rollback()
+                    failed.append((row, e))
+    return failed
@@ -0,0 +1,158 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
+from app.models import JobEmbedding
+from app.services.ai_engine import EMBEDDING_MODEL_ID, CHUNK_MODEL_ID, chunk_text, embed_chunks, embed_texts
+
+# Max number of job description vectors kept in process memory
+JD_EMBEDDING_CACHE_SIZE = int(os.getenv("JD_EMBEDDING_CACHE_SIZE", "256"))
+
+_jd_cache = OrderedDict()  # (job_id, content_hash[, chunking]) -> np.ndarray
+_jd_cache_lock = threading.Lock()
+
+def content_hash(text):
+    """SHA-256 hex digest of a text, used to detect stale embeddings"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def _cache_get(key):
+    with _jd_cache_lock:
+        vec = _jd_cache.get(key)
+        if vec is not None:
+            _jd_cache.move_to_end(key)
+        return vec
+
+def _cache_put(key, vec):
+    with _jd_cache_lock:
+        _jd_cache[key] = vec
+        _jd_cache.move_to_end(key)
+        while len(_jd_cache) > JD_EMBEDDING_CACHE_SIZE:
+            _jd_cache.popitem(last=False)
+
+def get_job_embedding(db, job):
+    """Return the embedding of a job description.
+    
+    Lookup order is the in-process LRU, then the ``job_embeddings`` table,
+    and only then the model. Returns None when no model is available.
+    """
+    key = (job.id, content_hash(job.description))
+    vec = _cache_get(key)
+    if vec is not None:
+        return vec
+    
+    row = db.query(JobEmbedding).filter(JobEmbedding.job_id == job.id).first()
+    if row and row.content_hash == key[1] and row.model_name == EMBEDDING_MODEL_ID:
+        vec = np.frombuffer(row.embedding, dtype=np.float32)
+    else:
+        try:
+            embs = embed_texts([job.description])
+        except Exception as e:
+            print(f"Error embedding job description: {e}")
+            embs = None
+        if embs is None:
+            return None
+        vec = embs[0]
+        if row is None:
+            row = JobEmbedding(job_id=job.id)
+            db.add(row)
+        row.content_hash = key[1]
+        row.model_name = EMBEDDING_MODEL_ID
+        row.embedding = vec.tobytes()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same job concurrently, its row is equivalent
+            db.rollback()
+    
+    _cache_put(key, vec)
+    return vec
+
+def invalidate_job_embedding(db, job_id):
+    """Drop cached and stored embeddings for a job, e.g. after an update"""
+    with _jd_cache_lock:
+        for key in [k for k in _jd_cache if k[0] == job_id]:
+            del _jd_cache[key]
+    db.query(JobEmbedding).filter(JobEmbedding.job_id == job_id).delete(synchronize_session=False)
+    db.commit()
+
+def get_resume_embeddings(db, contents, batch_size=None):
+    """Return an (n, dim) matrix for ResumeContent rows.
+    
+    Only rows without a stored vector for the current model are encoded, in
+    one batch, and the new vectors are persisted. Returns None when no model
+    is available.
+    """
+    missing = [c for c in contents if c.embedding is None or c.model_name != EMBEDDING_MODEL_ID]
+    if missing:
+        try:
+            embs = embed_texts([c.text for c in missing], batch_size=batch_size)
+        except Exception as e:
+            print(f"Error embedding resumes: {e}")
+            embs = None
+        if embs is None:
+            return None
+        for content, vec in zip(missing, embs):
+            content.embedding = vec.tobytes()
+            content.model_name = EMBEDDING_MODEL_ID
+        db.commit()
+    
+    if not contents:
+        return None
+    return np.vstack([np.frombuffer(c.embedding, dtype=np.float32) for c in contents])
+
+def pack_matrix(matrix):
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(matrix, dtype=np.float32), allow_pickle=False)
+    return buf.getvalue()
+
+def unpack_matrix(data):
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+def get_job_chunk_embeddings(job):
+    """(n_chunks, dim) matrix of a job description's sections.
+    
+    JDs are short, so the chunks are only kept in the in-process LRU.
+    Returns None when no model is available.
+    """
+    key = (job.id, content_hash(job.description), CHUNK_MODEL_ID)
+    matrix = _cache_get(key)
+    if matrix is not None:
+        return matrix
+    
+    try:
+        embs = embed_texts(chunk_text(job.description))
+    except Exception as e:
+        print(f"Error embedding job description chunks: {e}")
+        embs = None
+    if embs is None:
+        return None
+    _cache_put(key, embs)
+    return embs
+
+def get_resume_chunk_embeddings(db, contents, batch_size=None):
+    """Per-resume chunk matrices for ResumeContent rows.
+    
+    Like get_resume_embeddings, only rows without chunks for the current
+    model and chunking are encoded (all their chunks in one batch) and the
+    result is persisted. Returns None when no model is available.
+    """
+    missing = [c for c in contents if c.chunk_embeddings is None or c.chunk_model_name != CHUNK_MODEL_ID]
+    if missing:
+        try:
+            matrices = embed_chunks([c.text for c in missing], batch_size=batch_size)
+        except Exception as e:
+            print(f"Error embedding resume chunks: {e}")
+            matrices = None
+        if matrices is None:
+            return None
+        for content, matrix in zip(missing, matrices):
+            content.chunk_embeddings = pack_matrix(matrix)
+            content.chunk_model_name = CHUNK_MODEL_ID
+        db.commit()
+    
+    return [unpack_matrix(c.chunk_embeddings) for c in contents]
@@ -0,0 +1,226 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from fastapi import HTTPException, status
+
+# ===================== CONFIG =====================
+
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "16"))
+IO_QUEUE_DEPTH = int(os.getenv("IO_QUEUE_DEPTH", "256"))
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 2)))
+CPU_QUEUE_DEPTH = int(os.getenv("CPU_QUEUE_DEPTH", "64"))
+# CPU pool processes are started fresh instead of forked: by the time the
+# pool is created the server has threads, open database connections and
+# model state, none of which survive fork() safely
+CPU_POOL_START_METHOD = os.getenv("CPU_POOL_START_METHOD", "spawn")
+# Seconds between admission retries of callers that wait for a free slot
+POOL_WAIT_INTERVAL = float(os.getenv("POOL_WAIT_INTERVAL", "0.05"))
+# Each Argon2 call holds ARGON2_MEMORY_COST KiB while it runs
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(min(4, os.cpu_count() or 2))))
+PASSWORD_QUEUE_DEPTH = int(os.getenv("PASSWORD_QUEUE_DEPTH", "32"))
+# Seconds a timed out process pool call gets to stop by itself before its
+# worker processes are killed and the pool is replaced
+CPU_KILL_GRACE = float(os.getenv("CPU_KILL_GRACE", "5"))
+
+def _call_with_alarm(func, timeout, args, kwargs):
+    """Process pool entry point raising TimeoutError once ``func`` has run ``timeout`` seconds.
+    
+    Pure Python work (pdfminer) is interrupted by the alarm, so the worker
+    is free again right away. Where SIGALRM does not exist (Windows) the
+    caller's kill deadline is the only limit.
+    """
+    if not hasattr(signal, "setitimer"):
+        return func(*args, **kwargs)
+    
+    def expire(signum, frame):
+        raise TimeoutError(f"{getattr(func, '__name__', 'call')} ran longer than {timeout}s")
+    
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+# ===================== POOLS =====================
+
+class BoundedExecutor:
+    """Executor wrapper that caps in-flight work.
+    
+    At most ``max_workers + max_queue`` calls may be running or waiting;
+    beyond that callers get ``busy_status`` (503 by default) instead of
+    piling up behind the pool. A slot is held until the call has really
+    finished, so work abandoned by a timed out caller still counts.
+    """
+    
+    def __init__(self, name, executor_cls, max_workers, max_queue, busy_status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                 **executor_kwargs):
+        self.name = name
+        self.executor_cls = executor_cls
+        self.executor_kwargs = executor_kwargs
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.busy_status = busy_status
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def pending(self):
+        return self._pending
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.executor_cls(max_workers=self.max_workers, **self.executor_kwargs)
+            return self._executor
+    
+    async def run(self, func, *args, **kwargs):
+        """Run ``func`` in the pool without blocking the event loop"""
+        self._acquire()
+        return await self._submit(func, *args, **kwargs)
+    
+    async def run_waiting(self, func, *args, **kwargs):
+        """Like run, but wait for a free slot instead of failing.
+        
+        For internal batch work (e.g. every file of a ranking request) where
+        one rejected item would fail the whole batch.
+        """
+        while not self._try_acquire():
+            await asyncio.sleep(POOL_WAIT_INTERVAL)
+        return await self._submit(func, *args, **kwargs)
+    
+    async def run_timed(self, timeout, func, *args, wait=False):
+        """Run ``func`` in a process pool for at most ``timeout`` seconds.
+        
+        The limit counts from when a worker starts the call, so time spent
+        queued for a slot does not count. The call is stopped in the worker
+        by an alarm; if it has not ended CPU_KILL_GRACE seconds later (stuck
+        in C code) the pool's processes are killed and a fresh pool is
+        started. Raises TimeoutError. ``wait`` waits for a slot as
+        run_waiting does.
+        """
+        if wait:
+            while not self._try_acquire():
+                await asyncio.sleep(POOL_WAIT_INTERVAL)
+        else:
+            self._acquire()
+        executor, future = self._start(partial(_call_with_alarm, func, timeout, args, {}))
+        result = asyncio.wrap_future(future)
+        
+        # ProcessPoolExecutor marks a call running once it is handed to the
+        # workers, at most one call ahead of a free worker, so the kill
+        # deadline allows for one more full call before this one
+        while not future.running() and not future.done():
+            await asyncio.wait({result}, timeout=POOL_WAIT_INTERVAL)
+        done, _ = await asyncio.wait({result}, timeout=2 * timeout + CPU_KILL_GRACE)
+        if done:
+            return result.result()
+        
+        print(f"Warning: {self.name} pool call exceeded {timeout}s, replacing the worker processes")
+        # The call now fails with BrokenProcessPool, nobody is waiting for it
+        result.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._recycle(executor)
+        raise TimeoutError(f"{getattr(func, '__name__', 'call')} ran longer than {timeout}s")
+    
+    async def _submit(self, func, *args, **kwargs):
+        _, future = self._start(partial(func, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+    
+    def _start(self, call):
+        """Submit a call holding an acquired slot, returns (executor, future)"""
+        try:
+            executor = self._get_executor()
+            future = executor.submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the call ends, not when the awaiting caller gives up
+        future.add_done_callback(lambda _: self._release())
+        return executor, future
+    
+    def _recycle(self, executor):
+        """Kill the processes of ``executor``; the next call starts a fresh pool.
+        
+        Calls still running or queued on it fail with BrokenProcessPool and
+        give their slots back.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        for process in processes:
+            process.terminate()
+        executor.shutdown(wait=False)
+    
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def _try_acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            return True
+    
+    def _acquire(self):
+        if not self._try_acquire():
+            raise HTTPException(
+                status_code=self.busy_status,
+                detail=f"Server busy ({self.name} pool saturated), please retry",
+                headers={"Retry-After": "1"}
+            )
+    
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+# Blocking I/O, database work and model inference (which releases the GIL
+# and shares one copy of the weights across threads)
+io_pool = BoundedExecutor("io", ThreadPoolExecutor, IO_POOL_SIZE, IO_QUEUE_DEPTH)
+
+# Pure CPU work on picklable arguments, e.g. PDF text extraction
+cpu_pool = BoundedExecutor(
+    "cpu", ProcessPoolExecutor, CPU_POOL_SIZE, CPU_QUEUE_DEPTH,
+    mp_context=multiprocessing.get_context(CPU_POOL_START_METHOD)
+)
+
+# Argon2 hashing and verification (argon2-cffi releases the GIL). Kept apart
+# so a burst of logins cannot starve the other pools; when it is full, auth
+# requests are told to back off with a 429
+password_pool = BoundedExecutor(
+    "password", ThreadPoolExecutor, PASSWORD_POOL_SIZE, PASSWORD_QUEUE_DEPTH,
+    busy_status=status.HTTP_429_TOO_MANY_REQUESTS
+)
+
+async def run_blocking(func, *args, **kwargs):
+    return await io_pool.run(func, *args, **kwargs)
+
+async def run_blocking_waiting(func, *args, **kwargs):
+    return await io_pool.run_waiting(func, *args, **kwargs)
+
+async def run_cpu_bound(func, *args, **kwargs):
+    return await cpu_pool.run(func, *args, **kwargs)
+
+async def run_cpu_bound_waiting(func, *args, **kwargs):
+    return await cpu_pool.run_waiting(func, *args, **kwargs)
+
+async def run_cpu_bound_timed(timeout, func, *args, wait=False):
+    return await cpu_pool.run_timed(timeout, func, *args, wait=wait)
+
+async def run_password_hashing(func, *args, **kwargs):
+    return await password_pool.run(func, *args, **kwargs)
+
+def shutdown_executors():
+    io_pool.shutdown()
+    cpu_pool.shutdown()
+    password_pool.shutdown()
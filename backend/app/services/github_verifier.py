@@ -1,71 +1,180 @@
-import requests
+import asyncio
+import os
 import re
+import time
+from collections import OrderedDict
 from typing import List, Dict
 
-class GitHubVerifier:
-    """Verify projects exist on GitHub"""
+import httpx
+
+# ===================== CONFIG =====================
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "5"))
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+GITHUB_CACHE_SIZE = int(os.getenv("GITHUB_CACHE_SIZE", "4096"))
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", "3600"))
+GITHUB_NEGATIVE_CACHE_TTL = int(os.getenv("GITHUB_NEGATIVE_CACHE_TTL", "600"))
+
+GITHUB_LINK_PATTERN = r'https?://github\.com/([\w-]+)/([\w-]+)'
+
+def _repo_result(data: Dict) -> Dict:
+    return {
+        "exists": True,
+        "name": data.get("name"),
+        "url": data.get("html_url"),
+        "description": data.get("description"),
+        "stars": data.get("stargazers_count"),
+        "language": data.get("language"),
+        "verified": True
+    }
+
+def _not_found_result(status_code: int) -> Dict:
+    return {
+        "exists": False,
+        "verified": False,
+        "error": f"Repository not found (HTTP {status_code})"
+    }
+
+class AsyncGitHubVerifier:
+    """Concurrent GitHub verification for use inside async handlers.
     
-    GITHUB_API = "https://api.github.com"
+    Requests share one pooled httpx client and at most ``max_concurrency``
+    run at once. Lookups are cached for ``cache_ttl`` seconds (missing repos
+    for ``negative_ttl``), expired entries are revalidated with ETags, and
+    once GitHub reports the rate limit as exhausted no further calls are made
+    until it resets. ``transport`` replaces the network, e.g. with an
+    httpx.ASGITransport around the stand-in API in tests/fake_github.py.
+    """
     
-    @staticmethod
-    def extract_projects_from_text(text: str) -> List[str]:
-        """Extract potential project names from resume text"""
-        # Look for patterns like "Project Name", "github.com/user/repo", URLs, etc.
-        patterns = [
-            r'(?:github\.com/[\w-]+/([\w-]+))',  # github.com/user/repo
-            r'(?:Project[s]?\s*:?\s*)([\w\s-]+?)(?:\n|$)',  # Project: name
-            r'(?:Built|Created|Developed)\s+([\w\s-]+)\s+(?:using|with)',  # Built/Created name
-        ]
-        
-        projects = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            projects.extend(matches)
-        
-        return list(set([p.strip() for p in projects if p.strip()]))
+    def __init__(
+        self,
+        base_url: str = GITHUB_API_URL,
+        token: str = GITHUB_TOKEN,
+        max_concurrency: int = GITHUB_MAX_CONCURRENCY,
+        cache_size: int = GITHUB_CACHE_SIZE,
+        cache_ttl: int = GITHUB_CACHE_TTL,
+        negative_ttl: int = GITHUB_NEGATIVE_CACHE_TTL,
+        timeout: float = GITHUB_TIMEOUT,
+        transport: httpx.AsyncBaseTransport = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.max_concurrency = max_concurrency
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.transport = transport
+        self._cache = OrderedDict()  # (user, repo) -> (expires_at, result, etag)
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+        self._rate_limited_until = 0.0
+    
+    async def _ensure_client(self):
+        # Clients and semaphores are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            stale = self._client
+            headers = {"Accept": "application/vnd.github+json"}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            if stale is not None:
+                # Replaced only after the new client is set, so concurrent
+                # callers do not each open one
+                await self._close_client(stale)
+        return self._client
+    
+    def _cache_put(self, key, result, ttl, etag=None):
+        self._cache[key] = (time.time() + ttl, result, etag)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
     
-    @staticmethod
-    def verify_github_repo(username: str, repo_name: str) -> Dict:
+    def _track_rate_limit(self, response):
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            self._rate_limited_until = float(reset) if reset and reset.isdigit() else time.time() + 60
+    
+    async def verify_github_repo(self, username: str, repo_name: str) -> Dict:
         """Check if repository exists on GitHub"""
+        key = (username.lower(), repo_name.lower())
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.time():
+            self._cache.move_to_end(key)
+            return dict(entry[1])
+        
+        if time.time() < self._rate_limited_until:
+            if entry:
+                return dict(entry[1])
+            return {"exists": False, "verified": False, "error": "GitHub rate limit exceeded"}
+        
+        client = await self._ensure_client()
+        headers = {"If-None-Match": entry[2]} if entry and entry[2] else {}
         try:
-            url = f"{GitHubVerifier.GITHUB_API}/repos/{username}/{repo_name}"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "exists": True,
-                    "name": data.get("name"),
-                    "url": data.get("html_url"),
-                    "description": data.get("description"),
-                    "stars": data.get("stargazers_count"),
-                    "language": data.get("language"),
-                    "verified": True
-                }
-            else:
-                return {
-                    "exists": False,
-                    "verified": False,
-                    "error": f"Repository not found (HTTP {response.status_code})"
-                }
+            async with self._semaphore:
+                response = await client.get(f"/repos/{username}/{repo_name}", headers=headers)
         except Exception as e:
-            return {
-                "exists": False,
-                "verified": False,
-                "error": str(e)
-            }
+            return {"exists": False, "verified": False, "error": str(e)}
+        
+        self._track_rate_limit(response)
+        etag = response.headers.get("ETag")
+        if response.status_code == 304 and entry:
+            result = entry[1]
+            self._cache_put(key, result, self.cache_ttl, etag or entry[2])
+        elif response.status_code == 200:
+            result = _repo_result(response.json())
+            self._cache_put(key, result, self.cache_ttl, etag)
+        elif response.status_code in (404, 410, 451):
+            result = _not_found_result(response.status_code)
+            self._cache_put(key, result, self.negative_ttl, etag)
+        elif entry:
+            # Rate limited or server error, serve the stale entry
+            result = entry[1]
+        else:
+            result = _not_found_result(response.status_code)
+        return dict(result)
     
-    @staticmethod
-    def extract_github_links(text: str) -> List[Dict]:
-        """Extract GitHub links from text and verify them"""
-        github_pattern = r'https?://github\.com/([\w-]+)/([\w-]+)'
-        matches = re.findall(github_pattern, text, re.IGNORECASE)
+    async def extract_github_links(self, text: str) -> List[Dict]:
+        """Extract GitHub links from text and verify them concurrently"""
+        matches = list(dict.fromkeys(re.findall(GITHUB_LINK_PATTERN, text, re.IGNORECASE)))
+        results = await asyncio.gather(
+            *(self.verify_github_repo(username, repo) for username, repo in matches)
+        )
         
         verified_repos = []
-        for username, repo in matches:
-            verification = GitHubVerifier.verify_github_repo(username, repo)
+        for (username, repo), verification in zip(matches, results):
             verification["username"] = username
             verification["repo_name"] = repo
             verified_repos.append(verification)
         
         return verified_repos
+    
+    async def _close_client(self, client):
+        try:
+            await client.aclose()
+        except Exception as e:
+            # Connections opened on a loop that has since closed cannot be
+            # shut down cleanly; the sockets are released with the client
+            print(f"Warning: Could not close GitHub client: {e}")
+    
+    async def aclose(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await self._close_client(client)
+
+github_verifier = AsyncGitHubVerifier()
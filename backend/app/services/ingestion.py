@@ -0,0 +1,369 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+
+from app.database import SessionLocal, dialect_insert
+from app.models import Job, IngestionState, IngestionEvent
+from app.services.ai_engine import EMBED_BATCH_SIZE
+from app.services.executor import run_blocking, run_blocking_waiting
+from app.services.ranking_service import evaluate_resumes
+from app.services.resume_service import ingest_uploads
+from app.services.uploads import close_uploads
+
+# ===================== CONFIG =====================
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "5000"))
+# Resumes of one upload parsed and scored together, one encoder batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", str(EMBED_BATCH_SIZE)))
+# Finished jobs kept around so late websocket clients can still replay them
+INGEST_JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", "200"))
+PARTIAL_RANKING_SIZE = int(os.getenv("PARTIAL_RANKING_SIZE", "10"))
+# Uploads processed by another worker are followed by polling the database
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "0.5"))
+# An unfinished upload not updated for this long lost its worker
+INGEST_STALE_AFTER = int(os.getenv("INGEST_STALE_AFTER", "600"))
+# Finished uploads are deleted from the database after this many seconds
+INGEST_STATE_TTL = int(os.getenv("INGEST_STATE_TTL", str(24 * 3600)))
+
+FINISHED = ("completed", "failed")
+
+# ===================== JOBS =====================
+
+class IngestionJob:
+    """Progress of one background rank-candidates upload"""
+    
+    def __init__(self, job_id, recruiter_id, total, token=None):
+        self.token = token or str(uuid.uuid4())
+        self.job_id = job_id
+        self.recruiter_id = recruiter_id
+        self.total = total
+        self.processed = 0
+        self.failed = 0
+        self.status = "queued"
+        self.results = []
+        self.events = []
+        self.created_at = time.time()
+        self._changed = asyncio.Event()
+        self._saved_events = 0
+        self._save_lock = asyncio.Lock()
+    
+    @property
+    def done(self):
+        return self.processed + self.failed >= self.total
+    
+    def summary(self):
+        return {
+            "token": self.token,
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "failed": self.failed,
+            "progress": round((self.processed + self.failed) / self.total * 100) if self.total else 100
+        }
+    
+    def ranking(self, limit=None):
+        ranked = sorted(self.results, key=lambda x: x["match_score"], reverse=True)
+        return ranked[:limit] if limit else ranked
+    
+    def publish(self, **event):
+        event.update(self.summary())
+        self.events.append(event)
+        self._changed.set()
+    
+    async def save(self):
+        """Write the state and the events published since the last save"""
+        async with self._save_lock:
+            events = self.events[self._saved_events:]
+            state = {
+                "token": self.token,
+                "job_id": self.job_id,
+                "recruiter_id": self.recruiter_id,
+                "status": self.status,
+                "total": self.total,
+                "processed": self.processed,
+                "failed": self.failed,
+                "results": list(self.results)
+            }
+            await run_blocking_waiting(save_state, state, self._saved_events, events)
+            self._saved_events += len(events)
+    
+    async def stream(self):
+        """Yield every event from the start, then new ones until the job ends"""
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.status in FINISHED:
+                return
+            self._changed.clear()
+            await self._changed.wait()
+
+class StoredIngestionJob(IngestionJob):
+    """An upload processed by another worker process, read from the database"""
+    
+    def __init__(self, row):
+        super().__init__(row.job_id, row.recruiter_id, row.total, token=row.token)
+        self.status = row.status
+        self.processed = row.processed or 0
+        self.failed = row.failed or 0
+        self.results = row.results or []
+    
+    async def stream(self):
+        """Yield the stored events, polling for new ones until the job ends"""
+        seq = 0
+        while True:
+            row, events = await run_blocking(load_progress, self.token, seq)
+            for event in events:
+                yield event
+            seq += len(events)
+            if row is None or (row.status in FINISHED and not events):
+                return
+            if datetime.utcnow() - row.updated_at > timedelta(seconds=INGEST_STALE_AFTER):
+                return
+            if not events:
+                await asyncio.sleep(INGEST_POLL_INTERVAL)
+
+# ===================== PERSISTENCE =====================
+
+def save_state(state, first_seq, events):
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        insert = dialect_insert(db)
+        stmt = insert(IngestionState).values(**state, created_at=now, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IngestionState.token],
+            set_={
+                "status": stmt.excluded.status,
+                "processed": stmt.excluded.processed,
+                "failed": stmt.excluded.failed,
+                "results": stmt.excluded.results,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        db.execute(stmt)
+        if events:
+            db.execute(IngestionEvent.__table__.insert(), [
+                {"token": state["token"], "seq": first_seq + i, "payload": event}
+                for i, event in enumerate(events)
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+def load_state(token):
+    db = SessionLocal()
+    try:
+        return db.get(IngestionState, token)
+    finally:
+        db.close()
+
+def load_progress(token, after_seq):
+    """State and events from ``after_seq`` on, read in one transaction"""
+    db = SessionLocal()
+    try:
+        events = [payload for (payload,) in db.query(IngestionEvent.payload).filter(
+            IngestionEvent.token == token, IngestionEvent.seq >= after_seq
+        ).order_by(IngestionEvent.seq)]
+        return db.get(IngestionState, token), events
+    finally:
+        db.close()
+
+def delete_expired_states(ttl=INGEST_STATE_TTL):
+    """Remove finished uploads older than ``ttl`` seconds"""
+    db = SessionLocal()
+    try:
+        expired = db.query(IngestionState.token).filter(
+            IngestionState.status.in_(FINISHED),
+            IngestionState.updated_at < datetime.utcnow() - timedelta(seconds=ttl)
+        )
+        db.query(IngestionEvent).filter(IngestionEvent.token.in_(expired.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+        db.query(IngestionState).filter(IngestionState.token.in_(expired.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+# ===================== QUEUE =====================
+
+class IngestionQueue:
+    """In-process queue running save -> parse -> embed -> bias -> GitHub per resume.
+    
+    Uploads are queued in batches of INGEST_BATCH_SIZE, so each batch is
+    parsed and scored with one evaluate_resumes call. Job state is saved to
+    the database after every step of a batch; any worker process can then
+    report and stream it, not only the one holding the queue.
+    """
+    
+    def __init__(self, workers=INGEST_WORKERS, maxsize=INGEST_QUEUE_SIZE, batch_size=INGEST_BATCH_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.jobs = OrderedDict()
+        self.pending = 0  # queued uploads, not batches
+        self._queue = None
+        self._tasks = []
+    
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def submit(self, job_id, recruiter_id, uploads):
+        """Queue received uploads (SpooledUpload) and return the IngestionJob.
+        
+        The queue owns the uploads from here on and closes them once processed.
+        """
+        self._ensure_started()
+        if self.pending + len(uploads) > self.maxsize:
+            close_uploads(uploads)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingestion queue is full, please retry later"
+            )
+        
+        job = IngestionJob(job_id, recruiter_id, len(uploads))
+        self.jobs[job.token] = job
+        self._evict()
+        job.publish(step="Queued")
+        if not uploads:
+            job.status = "completed"
+            job.publish(step="Finalizing result", ranking=[])
+        try:
+            await run_blocking_waiting(delete_expired_states)
+            await job.save()
+        except BaseException:
+            del self.jobs[job.token]
+            close_uploads(uploads)
+            raise
+        
+        self.pending += len(uploads)
+        for start in range(0, len(uploads), self.batch_size):
+            self._queue.put_nowait((job, uploads[start:start + self.batch_size]))
+        return job
+    
+    async def find(self, token):
+        """The upload's job, from this process or from the database"""
+        job = self.jobs.get(token)
+        if job is not None:
+            return job
+        row = await run_blocking(load_state, token)
+        return StoredIngestionJob(row) if row is not None else None
+    
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+    
+    def _evict(self):
+        finished = [t for t, j in self.jobs.items() if j.status in FINISHED]
+        for token in finished[:max(0, len(finished) - INGEST_JOB_RETENTION)]:
+            del self.jobs[token]
+    
+    async def _worker(self):
+        # Every item ends up processed or failed, whatever goes wrong, so
+        # jobs always complete and workers never die
+        while True:
+            job, uploads = await self._queue.get()
+            reported = set()  # indexes of the uploads already counted
+            try:
+                await self._process(job, uploads, reported)
+            except Exception as e:
+                # Uploads the batch did not get to report on fail together
+                print(f"Error processing resume batch: {e}")
+                for index, upload in enumerate(uploads):
+                    if index not in reported:
+                        job.failed += 1
+                        job.publish(step="Error", filename=upload.filename, error=str(e))
+            finally:
+                close_uploads(uploads)
+                self.pending -= len(uploads)
+                self._queue.task_done()
+                if job.done and job.status not in FINISHED:
+                    job.status = "completed" if job.processed else "failed"
+                    job.publish(step="Finalizing result", ranking=job.ranking())
+                try:
+                    await job.save()
+                except Exception as e:
+                    print(f"Error saving ingestion state: {e}")
+    
+    async def _process(self, job, uploads, reported):
+        """Parse and score one batch of uploads, publishing per resume"""
+        job.status = "running"
+        db = SessionLocal()
+        try:
+            async def on_step(step):
+                for upload in uploads:
+                    job.publish(step=step, filename=upload.filename)
+            
+            await on_step("Parsing resume")
+            await job.save()
+            extracted = []
+            indexes = []
+            parsed = await ingest_uploads(uploads, db, persist=False)
+            for index, (filename, content) in enumerate(parsed):
+                if isinstance(content, BaseException):
+                    print(f"Error processing resume {filename}: {content}")
+                    reported.add(index)
+                    job.failed += 1
+                    job.publish(step="Error", filename=filename, error=str(content))
+                else:
+                    extracted.append((filename, str(uuid.uuid4()), content))
+                    indexes.append(index)
+            await job.save()
+            
+            async def on_eval_step(step):
+                for filename, _, _ in extracted:
+                    job.publish(step=step, filename=filename)
+            
+            results = []
+            if extracted:
+                job_row = await run_blocking(db.get, Job, job.job_id)
+                if job_row is None:
+                    raise RuntimeError("Job no longer exists")
+                results = await evaluate_resumes(db, job_row, extracted, on_step=on_eval_step)
+                await run_blocking(db.commit)
+            
+            by_id = {result["resume_id"]: result for result in results}
+            for index, (filename, resume_id, _) in zip(indexes, extracted):
+                result = by_id.get(resume_id)
+                reported.add(index)
+                if result is None:
+                    job.failed += 1
+                    job.publish(step="Error", filename=filename, error="Match could not be saved")
+                    continue
+                job.results.append(result)
+                job.processed += 1
+                job.publish(
+                    step="Resume processed",
+                    filename=filename,
+                    result=result,
+                    ranking=job.ranking(PARTIAL_RANKING_SIZE)
+                )
+        except Exception:
+            _discard_session(db, db.rollback)
+            raise
+        finally:
+            _discard_session(db, db.close)
+
+def _discard_session(db, method):
+    """Roll back or close a session without going through the (maybe saturated) I/O pool"""
+    try:
+        method()
+    except Exception as e:
+        print(f"Error cleaning up ingestion session: {e}")
+
+ingestion_queue = IngestionQueue()
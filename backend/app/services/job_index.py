@@ -0,0 +1,123 @@
+from sqlalchemy import func, insert, literal, select
+from app.models import Job, JobSkill, CandidateSkill, JobRecommendation, Resume
+from app.services.skill_matcher import canonical_skill
+
+def skill_key(name):
+    """Normalized form used by the skill indexes"""
+    return canonical_skill(name).lower()
+
+def skill_keys(skills):
+    return list(dict.fromkeys(skill_key(s) for s in skills or [] if s and s.strip()))
+
+def _job_scores(keys):
+    """(candidate_id, score) per candidate sharing a skill with a job requiring ``keys``"""
+    return select(
+        CandidateSkill.candidate_id, func.count(CandidateSkill.skill) * 100.0 / len(keys)
+    ).where(CandidateSkill.skill.in_(keys)).group_by(CandidateSkill.candidate_id)
+
+def index_job(db, job):
+    """Refresh a job's skill postings and its recommendation rows.
+    
+    Call after creating or updating a job, before committing. Candidates are
+    found through the candidate_skills index and their rows are written by
+    one INSERT ... SELECT, so no per-candidate objects are built here
+    however many candidates share a skill with the job.
+    """
+    db.flush()
+    keys = skill_keys(job.required_skills)
+    db.query(JobSkill).filter(JobSkill.job_id == job.id).delete(synchronize_session=False)
+    db.query(JobRecommendation).filter(JobRecommendation.job_id == job.id).delete(synchronize_session=False)
+    if keys:
+        db.execute(insert(JobSkill), [{"job_id": job.id, "skill": key} for key in keys])
+    
+    if not job.is_active or not keys:
+        return
+    
+    scores = _job_scores(keys).add_columns(literal(job.id))
+    db.execute(insert(JobRecommendation).from_select(["candidate_id", "score", "job_id"], scores))
+
+def _candidate_scores(candidate_ids=None):
+    """(candidate_id, job_id, score) for every active job sharing a skill with the candidates.
+    
+    The score is the share of the job's postings the candidate has, as in
+    index_job. All candidates when ``candidate_ids`` is None.
+    """
+    totals = select(JobSkill.job_id, func.count(JobSkill.skill).label("n")).group_by(JobSkill.job_id).subquery()
+    stmt = select(
+        CandidateSkill.candidate_id, JobSkill.job_id, func.count(JobSkill.skill) * 100.0 / totals.c.n
+    ).join(
+        JobSkill, JobSkill.skill == CandidateSkill.skill
+    ).join(
+        Job, Job.id == JobSkill.job_id
+    ).join(
+        totals, totals.c.job_id == JobSkill.job_id
+    ).where(
+        Job.is_active == True
+    ).group_by(CandidateSkill.candidate_id, JobSkill.job_id, totals.c.n)
+    if candidate_ids is not None:
+        stmt = stmt.where(CandidateSkill.candidate_id.in_(candidate_ids))
+    return stmt
+
+def index_candidate(db, candidate_id, skills):
+    """Refresh a candidate's skills and recommendation list, before committing"""
+    keys = skill_keys(skills)
+    db.query(CandidateSkill).filter(CandidateSkill.candidate_id == candidate_id).delete(synchronize_session=False)
+    db.query(JobRecommendation).filter(JobRecommendation.candidate_id == candidate_id).delete(synchronize_session=False)
+    if not keys:
+        return
+    
+    db.execute(insert(CandidateSkill), [{"candidate_id": candidate_id, "skill": key} for key in keys])
+    db.execute(insert(JobRecommendation).from_select(
+        ["candidate_id", "job_id", "score"], _candidate_scores([candidate_id])
+    ))
+
+def recommended_jobs(db, candidate_id, limit, offset=0):
+    """Page of active jobs for a candidate, best skill coverage first; no limit when ``limit`` is None"""
+    return db.query(Job).join(
+        JobRecommendation, JobRecommendation.job_id == Job.id
+    ).filter(
+        JobRecommendation.candidate_id == candidate_id,
+        Job.is_active == True
+    ).order_by(
+        JobRecommendation.score.desc(), Job.id
+    ).offset(offset).limit(limit).all()
+
+def rebuild_job_index(db):
+    """Backfill the indexes from existing jobs and primary resumes.
+    
+    Postings are bulk inserted and every recommendation is computed by a
+    single INSERT ... SELECT joining the two indexes.
+    """
+    db.query(JobRecommendation).delete(synchronize_session=False)
+    db.query(JobSkill).delete(synchronize_session=False)
+    db.query(CandidateSkill).delete(synchronize_session=False)
+    
+    postings = [
+        {"job_id": job_id, "skill": key}
+        for job_id, skills in db.query(Job.id, Job.required_skills).yield_per(1000)
+        for key in skill_keys(skills)
+    ]
+    if postings:
+        db.execute(insert(JobSkill), postings)
+    
+    # The newest primary resume of each candidate wins
+    candidates = {}
+    for candidate_id, skills in db.query(Resume.candidate_id, Resume.skills).filter(
+        Resume.is_primary == True
+    ).order_by(Resume.created_at).yield_per(1000):
+        candidates[candidate_id] = skills
+    skill_rows = [
+        {"candidate_id": candidate_id, "skill": key}
+        for candidate_id, skills in candidates.items()
+        for key in skill_keys(skills)
+    ]
+    if skill_rows:
+        db.execute(insert(CandidateSkill), skill_rows)
+    
+    db.execute(insert(JobRecommendation).from_select(["candidate_id", "job_id", "score"], _candidate_scores()))
+    db.commit()
+
+def ensure_job_index(db):
+    """Build the indexes once for databases created before they existed"""
+    if db.query(JobSkill).first() is None and db.query(Job).first() is not None:
+        rebuild_job_index(db)
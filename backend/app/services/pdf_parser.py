@@ -1,9 +1,66 @@
+import asyncio
+import io
+import os
 import pdfplumber
+from app.services.executor import run_cpu_bound_timed
 
-def extract_text_from_pdf(path):
-    text = ""
+# Pages beyond this are ignored, protects against pathological files
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+# Seconds of worker time allowed per CPU pool task of one document
+PDF_PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", "30"))
+# Pages handled by one worker task when a document is split
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+def iter_pdf_pages(path, start=0, stop=None):
+    """Yield the text of each page in [start, stop), extracting each page once"""
+    with pdfplumber.open(path) as pdf:
+        for p in pdf.pages[start:stop]:
+            text = p.extract_text()
+            if text:
+                yield text + "\n"
+
+def extract_page_range(path, start, stop):
+    """Worker entry point, returns the text of pages [start, stop)"""
+    return "".join(iter_pdf_pages(path, start, stop))
+
+def count_pages(path):
     with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            if p.extract_text():
-                text += p.extract_text() + "\n"
-    return text
+        return len(pdf.pages)
+
+def extract_text_from_pdf(path, max_pages=MAX_PDF_PAGES):
+    return "".join(iter_pdf_pages(path, 0, max_pages))
+
+def extract_text_from_pdf_bytes(data, max_pages=MAX_PDF_PAGES):
+    """Worker entry point for documents held in memory"""
+    return extract_text_from_pdf(io.BytesIO(data), max_pages)
+
+async def extract_bytes_async(data, max_pages=MAX_PDF_PAGES, timeout=PDF_PARSE_TIMEOUT, wait=False):
+    """Extract a small in-memory PDF in one CPU pool task, without touching disk.
+    
+    The task is stopped after ``timeout`` seconds of running (TimeoutError).
+    With ``wait`` a saturated CPU pool is waited for instead of raising 503.
+    """
+    return await run_cpu_bound_timed(timeout, extract_text_from_pdf_bytes, data, max_pages, wait=wait)
+
+async def stream_pdf_text(path, max_pages=MAX_PDF_PAGES, timeout=PDF_PARSE_TIMEOUT, wait=False):
+    """Asynchronously yield document text in page order.
+    
+    Large documents are split into ranges of PDF_PAGES_PER_TASK pages that
+    are extracted concurrently on the CPU pool; each range is yielded as soon
+    as it and all earlier ranges are done. Each task is stopped after
+    ``timeout`` seconds of running, raising TimeoutError; time spent queued
+    for a worker is not counted. ``wait`` is as for extract_bytes_async.
+    """
+    total = min(await run_cpu_bound_timed(timeout, count_pages, path, wait=wait), max_pages)
+    tasks = [
+        asyncio.ensure_future(run_cpu_bound_timed(
+            timeout, extract_page_range, path, start, min(start + PDF_PAGES_PER_TASK, total), wait=wait
+        ))
+        for start in range(0, total, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
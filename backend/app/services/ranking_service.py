@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+from app.models import JobMatch
+from app.services.ai_engine import MATCH_CHUNKING, calculate_match_batch
+from app.services.analytics import record_matched_skills, forget_matched_skills
+from app.services.bias_checker import check_bias
+from app.services.bulk_writer import bulk_insert
+from app.services.embedding_cache import (
+    get_job_embedding, get_resume_embeddings, get_job_chunk_embeddings, get_resume_chunk_embeddings
+)
+from app.services.executor import run_blocking
+from app.services.github_verifier import github_verifier
+
+def replace_matches(db, job_id, rows):
+    """Delete the job's earlier matches of the rows' resumes, before committing"""
+    stale = [
+        JobMatch.job_id == job_id,
+        JobMatch.resume_id.in_([row["resume_id"] for row in rows]),
+        JobMatch.id.notin_([row["id"] for row in rows])
+    ]
+    skill_lists = [skills for (skills,) in db.query(JobMatch.matched_skills).filter(*stale)]
+    db.query(JobMatch).filter(*stale).delete(synchronize_session=False)
+    forget_matched_skills(db, job_id, skill_lists)
+
+async def evaluate_resumes(db, job, extracted, on_step=None, replace=False):
+    """Score ingested resumes against a job and persist JobMatch rows.
+    
+    ``extracted`` is a list of (filename, resume_id, ResumeContent). Matches
+    are bulk inserted and committed in chunks; rows that fail to save are
+    left out of the result. With ``replace`` earlier matches of the same
+    resumes for the job are removed in the same transactions. ``on_step`` is
+    an optional coroutine function called with the name of each pipeline
+    stage. Returns the result payloads in input order.
+    """
+    async def step(name):
+        if on_step:
+            await on_step(name)
+    
+    # Calculate matches (job and resume embeddings are cached)
+    await step("Semantic matching")
+    contents = [content for _, _, content in extracted]
+    texts = [c.text for c in contents]
+    if MATCH_CHUNKING:
+        jd_chunks = await run_blocking(get_job_chunk_embeddings, job)
+        resume_chunks = await run_blocking(get_resume_chunk_embeddings, db, contents) if jd_chunks is not None else None
+        match_results = await run_blocking(
+            calculate_match_batch, texts, job.description, jd_chunks=jd_chunks, resume_chunks=resume_chunks
+        )
+    else:
+        jd_embedding = await run_blocking(get_job_embedding, db, job)
+        resume_embeddings = await run_blocking(get_resume_embeddings, db, contents) if jd_embedding is not None else None
+        match_results = await run_blocking(
+            calculate_match_batch, texts, job.description,
+            jd_embedding=jd_embedding,
+            resume_embeddings=resume_embeddings
+        )
+    
+    # Check bias
+    await step("Bias check")
+    # Depends on the job description only, one scan serves every resume
+    bias_results = [check_bias(job.description)] * len(texts)
+    
+    # Verify GitHub links of all resumes concurrently
+    await step("GitHub verification")
+    github_results = await asyncio.gather(
+        *(github_verifier.extract_github_links(text) for text in texts)
+    )
+    
+    rows = []
+    results = []
+    for (filename, resume_id, _), match_result, bias_result, github_projects in zip(
+        extracted, match_results, bias_results, github_results
+    ):
+        verified_count = sum(1 for p in github_projects if p.get("exists", False))
+        
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "job_id": job.id,
+            "resume_id": resume_id,
+            "match_score": match_result.get("match_score", 0),
+            "matched_skills": match_result.get("matched_skills", []),
+            "missing_skills": match_result.get("missing_skills", []),
+            "bias_risk_level": bias_result.get("risk_level", "Low"),
+            "bias_findings": bias_result.get("findings", []),
+            "projects_verified": verified_count
+        })
+        
+        results.append({
+            "filename": filename,
+            "resume_id": resume_id,
+            "match_score": match_result.get("match_score", 0),
+            "matched_skills": match_result.get("matched_skills", []),
+            "missing_skills": match_result.get("missing_skills", []),
+            "bias_risk": bias_result.get("risk_level", "Low"),
+            "github_projects": github_projects,
+            "verified_projects": verified_count
+        })
+    
+    # Save to database, skill stats are updated in the same transactions
+    def on_chunk(db, chunk):
+        if replace:
+            replace_matches(db, job.id, chunk)
+        record_matched_skills(db, job.id, [r["matched_skills"] for r in chunk])
+    
+    failed = await run_blocking(bulk_insert, db, JobMatch, rows, on_chunk=on_chunk)
+    failed_ids = {row["id"] for row, _ in failed}
+    for row, error in failed:
+        print(f"Error saving match for resume {row['resume_id']}: {error}")
+    
+    return [result for row, result in zip(rows, results) if row["id"] not in failed_ids]
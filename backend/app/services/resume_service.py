@@ -1,24 +1,183 @@
-import os, uuid, shutil
-from pathlib import Path
-from app.services.pdf_parser import extract_text_from_pdf
-
-# Get the base directory of the current file
-BASE_DIR = Path(__file__).parent.parent.parent  # Goes to backend/
-BASE = BASE_DIR / "storage" / "resumes"
-
-# Ensure directory exists
-BASE.mkdir(parents=True, exist_ok=True)
-
-def save_and_extract_resume(file):
-    rid = str(uuid.uuid4())
-    path = BASE / f"{rid}_{file.filename}"
-    with open(path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    if file.filename.lower().endswith(".pdf"):
-        text = extract_text_from_pdf(str(path))
-    else:
-        with open(path, "r", errors="ignore") as f:
-            text = f.read()
-
-    return rid, text
+import asyncio
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+from app.models import Resume, ResumeContent
+from app.services.bulk_writer import bulk_insert
+from app.services.executor import CPU_POOL_SIZE, run_blocking, run_blocking_waiting
+from app.services.pdf_parser import stream_pdf_text, extract_bytes_async
+from app.services.skill_matcher import extract_skills
+from app.services.storage import blob_key, get_storage
+from app.services.uploads import receive_upload, receive_uploads, close_uploads
+
+# Documents of one batch parsed at the same time; the rest wait their turn
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", str(CPU_POOL_SIZE)))
+
+def find_content(db, digest):
+    return db.query(ResumeContent).options(undefer(ResumeContent.full_text)).filter(
+        ResumeContent.content_hash == digest
+    ).first()
+
+def save_content(db, digest, file_path, text, skills=None):
+    content = ResumeContent(
+        content_hash=digest,
+        file_path=file_path,
+        full_text=text,
+        skills=skills if skills is not None else extract_skills(text)
+    )
+    db.add(content)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same file ingested concurrently by another request
+        db.rollback()
+        content = find_content(db, digest)
+    return content
+
+async def extract_upload(upload, wait=False):
+    """Return (text, skills) for a received upload.
+    
+    Text and small PDFs are extracted straight from the in-memory buffer.
+    Pages of a spilled PDF are consumed as they are extracted, so skill
+    matching runs alongside parsing instead of after it. Skill matching runs
+    on the I/O pool. With ``wait`` busy pools are waited for instead of
+    failing with 503.
+    """
+    run = run_blocking_waiting if wait else run_blocking
+    if upload.kind == "text":
+        data = upload.getvalue() if upload.in_memory else await run(upload.read_all)
+        text = data.decode("utf-8", errors="ignore")
+        return text, await run(extract_skills, text)
+    
+    if upload.in_memory:
+        text = await extract_bytes_async(upload.getvalue(), wait=wait)
+        return text, await run(extract_skills, text)
+    
+    parts = []
+    skills = {}
+    async for chunk in stream_pdf_text(upload.path, wait=wait):
+        parts.append(chunk)
+        skills.update(dict.fromkeys(await run(extract_skills, chunk)))
+    return "".join(parts), list(skills)
+
+def content_blob_key(content):
+    """Blob key of a ResumeContent, older rows hold a full path"""
+    return os.path.basename(content.file_path)
+
+def store_blob(upload, key):
+    """Keep the original file under ``key``, unless it is already stored"""
+    storage = get_storage()
+    if not storage.exists(key):
+        storage.put_upload(key, upload)
+
+async def ingest_resume(file, db, persist=True):
+    """Extract an upload once per content hash and return its ResumeContent.
+    
+    The upload is hashed, size checked and type sniffed while it is read.
+    Identical bytes map to the same blob and the same row, so a repeat
+    upload skips text extraction (and, via embedding_cache, encoding).
+    With ``persist=False`` (probe uploads) the original file only lives in
+    memory or a temporary file for the duration of the request. Storage and
+    database work runs on the I/O pool and PDF parsing on the CPU pool,
+    keeping the event loop free.
+    """
+    upload = await receive_upload(file)
+    try:
+        return await ingest_upload(upload, db, persist)
+    finally:
+        upload.close()
+
+async def ingest_upload(upload, db, persist=True, wait=False):
+    """ingest_resume for an upload that was already received, ``wait`` as for extract_upload"""
+    content = await run_blocking(find_content, db, upload.digest)
+    if content is None:
+        text, skills = await extract_upload(upload, wait=wait)
+        content = await run_blocking(
+            save_content, db, upload.digest, blob_key(upload.digest, upload.filename), text, skills
+        )
+    
+    # The blob goes under the key the content row, and so every Resume, refers
+    # to, whatever name these bytes were uploaded with this time
+    if persist:
+        await run_blocking(store_blob, upload, content_blob_key(content))
+    return content
+
+def find_contents(db, digests):
+    """ResumeContent rows by hash, with their full text loaded"""
+    rows = db.query(ResumeContent).options(undefer(ResumeContent.full_text)).filter(
+        ResumeContent.content_hash.in_(digests)
+    ).all()
+    return {row.content_hash: row for row in rows}
+
+def find_stored_resumes(db, resume_ids):
+    """(Resume, ResumeContent) pairs for stored resumes, with their full text loaded.
+    
+    Resumes uploaded before contents were kept per hash have no content row
+    and are left out.
+    """
+    return db.query(Resume, ResumeContent).join(
+        ResumeContent, ResumeContent.content_hash == Resume.content_hash
+    ).options(undefer(ResumeContent.full_text)).filter(Resume.id.in_(resume_ids)).all()
+
+async def ingest_resumes(files, db, persist=True):
+    """Batch version of ingest_resume.
+    
+    Every upload is received (and validated) before any parsing starts.
+    Known hashes are looked up in one query and new documents are parsed
+    INGEST_CONCURRENCY at a time, waiting for CPU pool slots rather than
+    being rejected when the pool is busy. Returns a list of (filename, ResumeContent or exception) in
+    upload order so one bad file does not fail the batch.
+    """
+    uploads = await receive_uploads(files)
+    try:
+        return await ingest_uploads(uploads, db, persist)
+    finally:
+        close_uploads(uploads)
+
+async def ingest_uploads(uploads, db, persist=True):
+    """ingest_resumes for uploads that were already received"""
+    known = await run_blocking(find_contents, db, list({upload.digest for upload in uploads}))
+    
+    new = {}
+    for upload in uploads:
+        if upload.digest not in known and upload.digest not in new:
+            new[upload.digest] = upload
+    
+    limit = asyncio.Semaphore(INGEST_CONCURRENCY)
+    
+    async def store(upload, key):
+        async with limit:
+            await run_blocking(store_blob, upload, key)
+    
+    async def extract(upload):
+        async with limit:
+            return await extract_upload(upload, wait=True)
+    
+    parsed = await asyncio.gather(*(extract(upload) for upload in new.values()), return_exceptions=True)
+    
+    rows = []
+    for (digest, upload), result in zip(new.items(), parsed):
+        if isinstance(result, BaseException):
+            known[digest] = result
+            continue
+        text, skills = result
+        rows.append({
+            "content_hash": digest,
+            "file_path": blob_key(digest, upload.filename),
+            "full_text": text,
+            "skills": skills
+        })
+    
+    # Rows inserted concurrently by another request are skipped, then read back
+    failed = await run_blocking(bulk_insert, db, ResumeContent, rows, ignore_conflicts=True)
+    for row, error in failed:
+        known[row["content_hash"]] = error
+    known.update(await run_blocking(find_contents, db, [row["content_hash"] for row in rows]))
+    
+    if persist:
+        unique = {upload.digest: upload for upload in uploads if isinstance(known[upload.digest], ResumeContent)}
+        await asyncio.gather(*(
+            store(upload, content_blob_key(known[digest])) for digest, upload in unique.items()
+        ))
+    
+    return [(upload.filename, known[upload.digest]) for upload in uploads]
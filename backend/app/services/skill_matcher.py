@@ -0,0 +1,145 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+# Optional JSON file mapping canonical skill names to lists of aliases
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH")
+
+DEFAULT_SKILL_TAXONOMY = {
+    "Python": ["python", "python3"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript", "ts"],
+    "Java": ["java"],
+    "React": ["react", "reactjs", "react.js"],
+    "Node.js": ["node.js", "nodejs", "node"],
+    "FastAPI": ["fastapi"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "SQL": ["sql"],
+    "PostgreSQL": ["postgresql", "postgres", "psql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "AWS": ["aws", "amazon web services"],
+    "Git": ["git"],
+    "Machine Learning": ["machine learning", "ml"],
+    "NLP": ["nlp", "natural language processing"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+}
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+class KeywordMatcher:
+    """Multi-pattern matcher built on an Aho-Corasick automaton.
+    
+    ``terms`` maps each (case-insensitive) pattern to the label reported
+    when it is found. The text is lowercased and scanned once regardless of
+    the number of patterns, and matches only count on word boundaries, so
+    "git" does not match inside "github".
+    """
+    
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # state -> [(pattern length, label)]
+        for pattern, label in terms.items():
+            self._add(pattern.lower(), label)
+        self._build()
+    
+    def _add(self, pattern, label):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), label))
+    
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0) if state else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+    
+    def find(self, text):
+        """Return the labels found in ``text``, unique, in order of first occurrence.
+        
+        Overlapping matches resolve to the leftmost-longest one, so
+        "node.js" is reported once rather than also as "js".
+        """
+        text = (text or "").lower()
+        matches = []
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, label in out[state]:
+                start = i - length + 1
+                if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+                    continue
+                if i + 1 < len(text) and _is_word_char(text[i]) and _is_word_char(text[i + 1]):
+                    continue
+                matches.append((start, -length, label))
+        
+        found = {}
+        covered_until = 0
+        for start, neg_length, label in sorted(matches):
+            if start < covered_until:
+                continue
+            covered_until = start - neg_length
+            found.setdefault(label, None)
+        return list(found)
+
+def load_skill_taxonomy():
+    if SKILL_TAXONOMY_PATH:
+        with open(SKILL_TAXONOMY_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_SKILL_TAXONOMY
+
+@lru_cache(maxsize=None)
+def get_skill_matcher():
+    """Matcher reporting canonical skill names for every alias"""
+    terms = {}
+    for canonical, aliases in load_skill_taxonomy().items():
+        terms[canonical] = canonical
+        for alias in aliases:
+            terms[alias] = canonical
+    return KeywordMatcher(terms)
+
+@lru_cache(maxsize=None)
+def get_skill_aliases():
+    """Lowercase canonical names and aliases -> canonical name"""
+    aliases = {}
+    for canonical, names in load_skill_taxonomy().items():
+        aliases[canonical.lower()] = canonical
+        for alias in names:
+            aliases[alias.lower()] = canonical
+    return aliases
+
+def canonical_skill(name):
+    """Map an exact skill name or alias to its canonical form.
+    
+    Anything else passes through with normalized whitespace, so "React
+    Native" or "AWS Lambda" stay distinct skills rather than becoming React
+    or AWS.
+    """
+    normalized = " ".join(name.split())
+    return get_skill_aliases().get(normalized.lower(), normalized)
+
+def extract_skills(text):
+    return get_skill_matcher().find(text)
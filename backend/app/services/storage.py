@@ -0,0 +1,267 @@
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+
+from app.models import Resume
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ===================== CONFIG =====================
+
+BASE_DIR = Path(__file__).parent.parent.parent  # Goes to backend/
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # local | s3
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", str(BASE_DIR / "storage" / "resumes")))
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "none")  # none | zstd
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# S3-compatible object storage (AWS S3, MinIO, ...)
+S3_BUCKET = os.getenv("S3_BUCKET", "resumes")
+S3_PREFIX = os.getenv("S3_PREFIX", "resumes/")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+
+# Blobs younger than this are never collected, uploads in flight may not
+# have their Resume row committed yet
+BLOB_GC_MIN_AGE = int(os.getenv("BLOB_GC_MIN_AGE", "3600"))
+
+COMPRESSED_SUFFIX = ".zst"
+
+# ===================== BACKENDS =====================
+
+def shard(key):
+    """Spread content-addressed keys over 256 * 256 directories"""
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+class BlobStorage(ABC):
+    """Content-addressed resume blobs, keyed by '<sha256><ext>'.
+    
+    Blobs are optionally zstd compressed; a compressed blob is stored under
+    its key plus '.zst', so both forms can be read after the setting changes.
+    """
+    
+    def __init__(self, compress=False):
+        self.compress = compress
+    
+    def _names(self, key):
+        """Stored names for a key, preferred (written) form first"""
+        plain = shard(key)
+        return [plain + COMPRESSED_SUFFIX, plain] if self.compress else [plain, plain + COMPRESSED_SUFFIX]
+    
+    def _encode(self, data):
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data) if self.compress else data
+    
+    @staticmethod
+    def _decode(name, data):
+        if not name.endswith(COMPRESSED_SUFFIX):
+            return data
+        if zstandard is None:
+            raise RuntimeError(f"{name} is zstd compressed but zstandard is not installed")
+        # Streamed frames carry no content size, so decompress incrementally
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    
+    def put_upload(self, key, upload):
+        """Store a SpooledUpload, from memory or from its spill file"""
+        if upload.in_memory:
+            self.put(key, upload.getvalue())
+        else:
+            self.put_file(key, upload.path)
+    
+    def put_file(self, key, path):
+        with open(path, "rb") as f:
+            self.put(key, f.read())
+    
+    @abstractmethod
+    def put(self, key, data):
+        ...
+    
+    @abstractmethod
+    def get(self, key):
+        ...
+    
+    @abstractmethod
+    def exists(self, key):
+        ...
+    
+    @abstractmethod
+    def delete(self, key):
+        ...
+    
+    @abstractmethod
+    def iter_blobs(self):
+        """Yield (key, last modified timestamp) for every stored blob"""
+
+class LocalStorage(BlobStorage):
+    """Blobs on the local filesystem under hash-sharded directories"""
+    
+    def __init__(self, root=STORAGE_DIR, compress=False):
+        super().__init__(compress)
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _write(self, key, write):
+        path = self.root / self._names(key)[0]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    
+    def put(self, key, data):
+        self._write(key, lambda f: f.write(self._encode(data)))
+    
+    def put_file(self, key, path):
+        """Stream a file into storage without loading it whole"""
+        def write(f):
+            with open(path, "rb") as src:
+                if self.compress:
+                    zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, f)
+                else:
+                    shutil.copyfileobj(src, f)
+        self._write(key, write)
+    
+    def get(self, key):
+        # Flat '<name>' files are blobs written before sharding
+        for name in self._names(key) + [key]:
+            path = self.root / name
+            if path.exists():
+                return self._decode(name, path.read_bytes())
+        raise FileNotFoundError(key)
+    
+    def exists(self, key):
+        return any((self.root / name).exists() for name in self._names(key))
+    
+    def delete(self, key):
+        for name in self._names(key) + [key]:
+            (self.root / name).unlink(missing_ok=True)
+    
+    def iter_blobs(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                key = filename[:-len(COMPRESSED_SUFFIX)] if filename.endswith(COMPRESSED_SUFFIX) else filename
+                yield key, os.path.getmtime(os.path.join(dirpath, filename))
+
+class S3Storage(BlobStorage):
+    """Blobs in an S3-compatible bucket, e.g. MinIO via S3_ENDPOINT_URL"""
+    
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, client=None, compress=False):
+        super().__init__(compress)
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+    
+    def _head(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + name)
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+    
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + self._names(key)[0], Body=self._encode(data))
+    
+    def put_file(self, key, path):
+        if self.compress:
+            super().put_file(key, path)
+        else:
+            # Multipart upload straight from disk
+            self.client.upload_file(path, self.bucket, self.prefix + self._names(key)[0])
+    
+    def get(self, key):
+        for name in self._names(key):
+            if self._head(name):
+                body = self.client.get_object(Bucket=self.bucket, Key=self.prefix + name)["Body"].read()
+                return self._decode(name, body)
+        raise FileNotFoundError(key)
+    
+    def exists(self, key):
+        return any(self._head(name) for name in self._names(key))
+    
+    def delete(self, key):
+        for name in self._names(key):
+            self.client.delete_object(Bucket=self.bucket, Key=self.prefix + name)
+    
+    def iter_blobs(self):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                filename = obj["Key"].rsplit("/", 1)[-1]
+                key = filename[:-len(COMPRESSED_SUFFIX)] if filename.endswith(COMPRESSED_SUFFIX) else filename
+                yield key, obj["LastModified"].timestamp()
+
+@lru_cache(maxsize=None)
+def get_storage():
+    """Storage backend selected by STORAGE_BACKEND / STORAGE_COMPRESSION.
+    
+    Raises instead of falling back when the configured backend or codec is
+    not available, so blobs are never written in an unexpected form.
+    """
+    if STORAGE_COMPRESSION not in ("none", "zstd"):
+        raise ValueError(f"Unknown storage compression: {STORAGE_COMPRESSION}")
+    compress = STORAGE_COMPRESSION == "zstd"
+    if compress and zstandard is None:
+        raise RuntimeError("STORAGE_COMPRESSION=zstd needs the zstandard package")
+    if STORAGE_BACKEND == "s3":
+        try:
+            return S3Storage(compress=compress)
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs the boto3 package") from e
+    if STORAGE_BACKEND != "local":
+        raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return LocalStorage(compress=compress)
+
+def blob_key(digest, filename):
+    return f"{digest}{Path(filename or '').suffix.lower()}"
+
+# ===================== GARBAGE COLLECTION =====================
+
+def collect_garbage(db, storage=None, min_age=BLOB_GC_MIN_AGE, dry_run=False):
+    """Delete blobs that no Resume.file_path refers to.
+    
+    Older rows may hold a full path, so references are compared by file
+    name. Returns the keys that were (or, with ``dry_run``, would be)
+    deleted.
+    """
+    storage = storage or get_storage()
+    referenced = {
+        os.path.basename(file_path)
+        for (file_path,) in db.query(Resume.file_path).filter(Resume.file_path.isnot(None)).yield_per(1000)
+    }
+    cutoff = time.time() - min_age
+    garbage = [key for key, modified in storage.iter_blobs() if key not in referenced and modified < cutoff]
+    if not dry_run:
+        for key in garbage:
+            storage.delete(key)
+    return garbage
+
+if __name__ == "__main__":
+    # python -m app.services.storage [--dry-run]
+    import sys
+    from app.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        dry_run = "--dry-run" in sys.argv
+        keys = collect_garbage(db, dry_run=dry_run)
+        print(f"{'Would delete' if dry_run else 'Deleted'} {len(keys)} unreferenced blobs")
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, status
+
+from app.services.executor import run_blocking
+
+# Largest accepted resume upload
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Bytes read from the request per step
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+# Uploads up to this size stay in memory and are parsed from there,
+# larger ones are spilled to a temporary file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(2 * 1024 * 1024)))
+
+def sniff_kind(head):
+    """Resume type from the first bytes of an upload: "pdf", "text" or None.
+    
+    Images, archives and office documents contain NUL bytes early on, plain
+    text never does.
+    """
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if b"\x00" not in head:
+        return "text"
+    return None
+
+class SpooledUpload:
+    """An upload received in fixed-size chunks.
+    
+    Hashing and size accounting happen while the bytes arrive. Content is
+    kept in memory up to ``spool_bytes`` (UPLOAD_SPOOL_BYTES by default) and
+    spilled to a temporary file beyond that. Call close() when done.
+    """
+    
+    def __init__(self, filename, spool_bytes=None):
+        self.filename = filename
+        self.kind = None
+        self.size = 0
+        self.spool_bytes = UPLOAD_SPOOL_BYTES if spool_bytes is None else spool_bytes
+        self._sha256 = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+        self._path = None
+    
+    @property
+    def digest(self):
+        return self._sha256.hexdigest()
+    
+    @property
+    def in_memory(self):
+        return self._path is None
+    
+    @property
+    def path(self):
+        """Temporary file holding a spilled upload"""
+        return self._path
+    
+    def write(self, chunk):
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        if self._path is None and len(self._buffer) + len(chunk) <= self.spool_bytes:
+            self._buffer.extend(chunk)
+            return
+        if self._path is None:
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            self._path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        self._file.write(chunk)
+    
+    def getvalue(self):
+        """Content of an in-memory upload"""
+        return bytes(self._buffer)
+    
+    def flush(self):
+        """Finish writing a spilled upload, it stays readable through ``path``.
+        
+        The file handle is closed, so queued uploads do not hold descriptors.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def read_all(self):
+        if self.in_memory:
+            return self.getvalue()
+        with open(self._path, "rb") as f:
+            return f.read()
+    
+    def close(self):
+        self.flush()
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+            self._path = None
+        self._buffer = bytearray()
+
+async def receive_upload(file, max_bytes=None, spool_bytes=None):
+    """Stream an UploadFile into a SpooledUpload.
+    
+    Oversized uploads (413) and files that are neither PDF nor plain text
+    (415) are rejected while reading, before any parsing work starts.
+    ``spool_bytes=0`` writes every byte to disk.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    too_large = HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"{file.filename} is larger than the {max_bytes} byte upload limit"
+    )
+    if getattr(file, "size", None) and file.size > max_bytes:
+        raise too_large
+    
+    upload = SpooledUpload(file.filename, spool_bytes)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if upload.size == 0:
+                upload.kind = sniff_kind(chunk)
+                if upload.kind is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail=f"{file.filename} is not a PDF or plain text resume"
+                    )
+            if upload.size + len(chunk) > max_bytes:
+                raise too_large
+            if upload.in_memory and upload.size + len(chunk) <= upload.spool_bytes:
+                upload.write(chunk)
+            else:
+                await run_blocking(upload.write, chunk)
+        
+        if upload.size == 0:
+            upload.kind = "text"
+        if not upload.in_memory:
+            await run_blocking(upload.flush)
+        return upload
+    except BaseException:
+        upload.close()
+        raise
+
+async def receive_uploads(files, max_bytes=None, spool_bytes=None):
+    """receive_upload for several files, all or nothing"""
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await receive_upload(file, max_bytes, spool_bytes))
+    except BaseException:
+        close_uploads(uploads)
+        raise
+    return uploads
+
+def close_uploads(uploads):
+    for upload in uploads:
+        upload.close()
@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from app.models import User
+from app.schemas import UserResponse
+
+# Profiles served by /auth/me without a database round trip. Entries are
+# dropped when this process updates the user; the TTL bounds how stale a
+# profile changed by another worker can get.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+
+_profiles = OrderedDict()  # user_id -> (expires_at, UserResponse)
+_profiles_lock = threading.Lock()
+
+def get_cached_profile(user_id):
+    with _profiles_lock:
+        entry = _profiles.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del _profiles[user_id]
+            return None
+        _profiles.move_to_end(user_id)
+        return entry[1]
+
+def cache_profile(user):
+    """Cache and return the UserResponse of a User row"""
+    profile = UserResponse.from_orm(user)
+    with _profiles_lock:
+        _profiles[user.id] = (time.time() + USER_CACHE_TTL, profile)
+        _profiles.move_to_end(user.id)
+        while len(_profiles) > USER_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+def invalidate_profile(user_id):
+    with _profiles_lock:
+        _profiles.pop(user_id, None)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_profile(target.id)
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.models import Resume, ResumeContent
+from app.services.ai_engine import EMBEDDING_MODEL_ID
+
+BASE_DIR = Path(__file__).parent.parent.parent  # Goes to backend/
+INDEX_DIR = Path(os.getenv("RESUME_INDEX_DIR", str(BASE_DIR / "storage" / "index")))
+
+# Width of the id field of a record, resume ids are uuid4 strings
+RECORD_ID_BYTES = 64
+
+def record_dtype(dim):
+    return np.dtype([("id", f"S{RECORD_ID_BYTES}"), ("vector", "<f4", (dim,))])
+
+class ResumeVectorIndex:
+    """Exact cosine-similarity index over stored resume embeddings.
+    
+    ``vectors.bin`` holds fixed-size (resume id, L2-normalized float32 row)
+    records and is opened as a read-only memory map, so searching is one
+    matrix-vector product and the OS page cache is shared between workers.
+    The file is append-only: each addition is a single append, and every
+    worker re-maps the file once it has grown or been replaced, so vectors
+    added by other processes show up and none are lost. Ids are unique in
+    search results even if two workers appended the same resume.
+    """
+    
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = Path(directory)
+        self.vectors_path = self.directory / "vectors.bin"
+        self.meta_path = self.directory / "meta.json"
+        self._lock = threading.Lock()
+        self._dtype = None
+        self._records = None
+        self._ids = []
+        self._known = set()
+        self._duplicate = np.zeros(0, dtype=bool)  # rows repeating an earlier id
+        self._stat = None  # (inode, size) of the mapped file
+        self._loaded = False
+    
+    def __len__(self):
+        return len(self._known)
+    
+    def load(self):
+        """Open the on-disk index, returns False if it is missing or stale"""
+        if not self.vectors_path.exists() or not self.meta_path.exists():
+            return False
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model_name") != EMBEDDING_MODEL_ID:
+            return False
+        with self._lock:
+            self._dtype = record_dtype(meta["dim"]) if meta.get("dim") else None
+            self._reset()
+            self._map()
+            self._loaded = True
+        return True
+    
+    def rebuild(self, db):
+        """Rebuild the index from every stored resume embedding"""
+        rows = db.query(Resume.id, ResumeContent.embedding).join(
+            ResumeContent, Resume.content_hash == ResumeContent.content_hash
+        ).filter(
+            ResumeContent.embedding.isnot(None),
+            ResumeContent.model_name == EMBEDDING_MODEL_ID
+        ).all()
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            dim = len(rows[0][1]) // 4 if rows else None
+            self._dtype = record_dtype(dim) if dim else None
+            records = self._records_for([r[0] for r in rows], [np.frombuffer(r[1], dtype=np.float32) for r in rows])
+            tmp_path = self.vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(records.tobytes() if records is not None else b"")
+            os.replace(tmp_path, self.vectors_path)
+            self._write_meta(dim)
+            self._reset()
+            self._map()
+            self._loaded = True
+    
+    def ensure_loaded(self, db):
+        if not self._loaded and not self.load():
+            self.rebuild(db)
+    
+    def add(self, resume_id, vector):
+        """Append a vector, unless the resume is already indexed"""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._map()
+            if resume_id in self._known:
+                return
+            if self._dtype is None:
+                # First vector of an index built from an empty database
+                self._dtype = record_dtype(len(vector))
+                self._write_meta(len(vector))
+            with open(self.vectors_path, "ab") as f:
+                f.write(self._records_for([resume_id], [vector]).tobytes())
+            self._map()
+    
+    def search(self, query, top_k=10):
+        """Return up to ``top_k`` (resume_id, score) pairs, best first"""
+        with self._lock:
+            self._map()
+            records, ids, duplicate, unique = self._records, self._ids, self._duplicate, len(self._known)
+        if records is None or not unique:
+            return []
+        
+        scores = records["vector"] @ np.asarray(query, dtype=np.float32)
+        if duplicate.any():
+            scores[duplicate] = -np.inf
+        k = min(top_k, unique)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+    
+    def _records_for(self, ids, vectors):
+        if not ids:
+            return None
+        records = np.zeros(len(ids), dtype=self._dtype)
+        records["id"] = [resume_id.encode("ascii") for resume_id in ids]
+        records["vector"] = np.vstack(vectors)
+        return records
+    
+    def _write_meta(self, dim):
+        tmp_meta = self.meta_path.with_suffix(".tmp")
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"model_name": EMBEDDING_MODEL_ID, "dim": dim}, f)
+        os.replace(tmp_meta, self.meta_path)
+    
+    def _reset(self):
+        self._records = None
+        self._ids = []
+        self._known = set()
+        self._duplicate = np.zeros(0, dtype=bool)
+        self._stat = None
+    
+    def _map(self):
+        """Map the records file again if it was appended to or replaced"""
+        try:
+            st = os.stat(self.vectors_path)
+        except FileNotFoundError:
+            return
+        if self._dtype is None or (st.st_ino, st.st_size) == self._stat:
+            return
+        if self._stat is None or st.st_ino != self._stat[0]:
+            self._reset()
+        
+        # A record being appended right now is picked up next time
+        count = st.st_size // self._dtype.itemsize
+        records = np.memmap(self.vectors_path, dtype=self._dtype, mode="r", shape=(count,)) if count else None
+        new_duplicate = []
+        for raw in (records["id"][len(self._ids):] if records is not None else []):
+            resume_id = raw.decode("ascii")
+            new_duplicate.append(resume_id in self._known)
+            self._ids.append(resume_id)
+            self._known.add(resume_id)
+        self._duplicate = np.concatenate([self._duplicate, np.array(new_duplicate, dtype=bool)])
+        self._records = records
+        self._stat = (st.st_ino, st.st_size)
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_resume_index(db):
+    """Process-wide index, loaded from disk or rebuilt from the database"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResumeVectorIndex()
+        _index.ensure_loaded(db)
+    return _index
@@ -0,0 +1,102 @@
+"""Per-request cost of authentication, with and without the auth caches.
+
+Run from backend/:
+
+    python -m benchmarks.auth_overhead [--requests 3000]
+
+Requests go through httpx.ASGITransport, so only in-process work is
+measured. The database is a throwaway SQLite file unless DATABASE_URL is
+set. "Uncached" disables the verified-token and /auth/me profile caches
+and runs the auth dependency as a sync function, the way it worked before
+they were added.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import timeit
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/bench.db")
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app import auth
+from app.api import auth as auth_api
+from app.database import dispose_async_engine, engine
+from app.migrations import run_migrations
+from app.services import user_cache
+
+USER = {"email": "bench@example.com", "username": "bench", "password": "bench-password",
+        "full_name": "Bench", "user_type": "recruiter"}
+
+def sync_current_user(credentials=Depends(auth.security)):
+    # Runs on the threadpool, like the dependency did before it was async
+    return auth.decode_token(credentials.credentials)
+
+def create_app():
+    app = FastAPI()
+    app.include_router(auth_api.router)
+    
+    @app.get("/bench/none")
+    async def no_auth():
+        return {}
+    
+    @app.get("/bench/auth")
+    async def with_auth(user: dict = Depends(auth.get_current_user)):
+        return {}
+    
+    @app.get("/bench/sync-auth")
+    async def with_sync_auth(user: dict = Depends(sync_current_user)):
+        return {}
+    return app
+
+def set_caches(enabled):
+    auth._token_cache.clear()
+    auth.TOKEN_CACHE_SIZE = 10000 if enabled else 0
+    user_cache._profiles.clear()
+    user_cache.USER_CACHE_TTL = 60 if enabled else 0
+
+async def per_request(client, path, headers, count):
+    """Mean microseconds per GET after a short warm-up"""
+    for _ in range(50):
+        await client.get(path, headers=headers)
+    start = time.perf_counter()
+    for _ in range(count):
+        response = await client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return (time.perf_counter() - start) / count * 1e6
+
+async def measure(client, headers, token, count, cached):
+    set_caches(cached)
+    decode = timeit.timeit(lambda: auth.decode_token(token), number=count) / count * 1e6
+    baseline = await per_request(client, "/bench/none", {}, count)
+    dependency = await per_request(client, "/bench/auth" if cached else "/bench/sync-auth", headers, count)
+    me = await per_request(client, "/auth/me", headers, count)
+    return decode, dependency - baseline, me
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    
+    run_migrations(engine)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://bench") as client:
+        response = await client.post("/auth/register", json=USER)
+        if response.status_code != 200:
+            response = await client.post("/auth/login", json={"email": USER["email"], "password": USER["password"]})
+        token = response.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        uncached = await measure(client, headers, token, args.requests, cached=False)
+        cached = await measure(client, headers, token, args.requests, cached=True)
+    await dispose_async_engine()
+    
+    print(f"{'':28s} {'uncached':>10s} {'cached':>10s}")
+    for label, before, after in zip(("decode_token", "auth dependency overhead", "GET /auth/me"), uncached, cached):
+        print(f"{label:28s} {before:8.1f}us {after:8.1f}us")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""JobMatch persistence: ORM add-and-commit versus bulk_writer.bulk_insert.
+
+Run from backend/:
+
+    python -m benchmarks.bulk_insert [--rows 5000] [--chunk-size 500] [--repeat 3]
+
+Each run writes to a fresh SQLite file unless DATABASE_URL is set. The
+bulk timing includes one commit per chunk, the way the scoring pipeline
+writes matches.
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/bench.db")
+
+from app.database import Base, SessionLocal, engine
+from app.models import JobMatch
+from app.services.bulk_writer import BULK_CHUNK_SIZE, bulk_insert
+
+def match_rows(count):
+    return [{
+        "id": str(uuid.uuid4()),
+        "job_id": "bench-job",
+        "resume_id": f"bench-resume-{i}",
+        "match_score": float(i % 100),
+        "matched_skills": ["Python", "SQL"],
+        "missing_skills": ["AWS"],
+        "bias_risk_level": "Low",
+        "bias_findings": [],
+        "projects_verified": 0
+    } for i in range(count)]
+
+def orm_insert(db, rows):
+    for row in rows:
+        db.add(JobMatch(**row))
+    db.commit()
+
+def timed(write, rows):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        write(db, rows)
+        elapsed = time.perf_counter() - start
+        db.query(JobMatch).filter(JobMatch.job_id == "bench-job").delete()
+        db.commit()
+        return elapsed
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    writers = {
+        "orm": orm_insert,
+        "bulk": lambda db, rows: bulk_insert(db, JobMatch, rows, chunk_size=args.chunk_size),
+    }
+    best = {}
+    for name, write in writers.items():
+        timed(write, match_rows(min(args.rows, 100)))  # warm-up
+        best[name] = min(timed(write, match_rows(args.rows)) for _ in range(args.repeat))
+        print(f"{name:5s} {best[name] * 1000:8.0f} ms for {args.rows} matches")
+    print(f"bulk is {best['orm'] / best['bulk']:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Encoding throughput of the torch and onnx embedding backends.
+
+Run from backend/ on the target node:
+
+    python -m benchmarks.embedding_backends [--texts 256] [--repeat 3]
+
+Texts are resumes from the database when there are enough of them,
+synthetic resumes otherwise. A backend that cannot be loaded is reported
+and skipped.
+"""
+import argparse
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.services.ai_engine import EMBED_BATCH_SIZE, MODEL_NAME, ONNX_MODEL_FILE, check_onnx_model_file
+
+SAMPLE_RESUME = (
+    "Software engineer with {years} years of experience in Python, SQL and Docker. "
+    "Built machine learning pipelines on AWS, NLP services and REST APIs. "
+) * 8
+
+def sample_texts(count):
+    try:
+        from app.database import SessionLocal
+        from app.models import ResumeContent
+        
+        db = SessionLocal()
+        try:
+            texts = [content.text for content in db.query(ResumeContent).limit(count)]
+        finally:
+            db.close()
+        if len(texts) == count and all(texts):
+            return texts
+    except Exception as e:
+        print(f"Using synthetic resumes ({e})")
+    return [SAMPLE_RESUME.format(years=i % 15 + 1) for i in range(count)]
+
+def load(backend):
+    if backend == "onnx":
+        check_onnx_model_file(ONNX_MODEL_FILE)
+        return SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE})
+    return SentenceTransformer(MODEL_NAME)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    texts = sample_texts(args.texts)
+    vectors = {}
+    for backend in ("torch", "onnx"):
+        try:
+            model = load(backend)
+        except Exception as e:
+            print(f"{backend:6s} unavailable: {e}")
+            continue
+        model.encode(texts[:args.batch_size], batch_size=args.batch_size)  # warm-up
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            embs = model.encode(texts, batch_size=args.batch_size, normalize_embeddings=True)
+            best = min(best, time.perf_counter() - start)
+        vectors[backend] = np.asarray(embs, dtype=np.float32)
+        print(f"{backend:6s} {len(texts) / best:8.1f} texts/s  ({best * 1000:.0f} ms for {len(texts)} texts)")
+    
+    if len(vectors) == 2:
+        cosine = (vectors["torch"] * vectors["onnx"]).sum(axis=1)
+        print(f"cosine torch/onnx: min {cosine.min():.4f}, mean {cosine.mean():.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Stand-in for the GitHub REST API's ``GET /repos/{owner}/{repo}``.
+
+Serves a fixed set of repositories with ETags, 404s for everything else,
+an optional per-request latency and a rate limit, and counts the requests
+it receives. Used in-process by the tests through httpx.ASGITransport, or
+run on its own to benchmark the verifier without touching GitHub:
+
+    FAKE_GITHUB_LATENCY=0.2 uvicorn tests.fake_github:app --port 9000
+    GITHUB_API_URL=http://127.0.0.1:9000 uvicorn app.main:app
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request, Response
+
+REPOS = {
+    ("octocat", "hello-world"): {"stargazers_count": 2500, "language": "Python"},
+    ("torvalds", "linux"): {"stargazers_count": 180000, "language": "C"},
+    ("psf", "requests"): {"stargazers_count": 52000, "language": "Python"},
+}
+
+def create_app(repos=None, latency=None, rate_limit=None):
+    """App serving ``repos``; ``rate_limit`` calls are answered before 403s"""
+    app = FastAPI(title="Fake GitHub API")
+    app.state.repos = {key: dict(data) for key, data in (repos or REPOS).items()}
+    app.state.latency = float(os.getenv("FAKE_GITHUB_LATENCY", "0")) if latency is None else latency
+    app.state.rate_limit = rate_limit
+    app.state.calls = 0
+    app.state.not_modified = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    
+    @app.get("/repos/{owner}/{repo}")
+    async def get_repo(owner: str, repo: str, request: Request):
+        state = request.app.state
+        state.calls += 1
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if state.latency:
+                await asyncio.sleep(state.latency)
+        finally:
+            state.in_flight -= 1
+        
+        headers = {}
+        if state.rate_limit is not None:
+            remaining = max(state.rate_limit - state.calls, -1)
+            headers["X-RateLimit-Remaining"] = str(max(remaining, 0))
+            headers["X-RateLimit-Reset"] = str(int(time.time()) + 3600)
+            if remaining < 0:
+                return Response(status_code=403, headers=headers)
+        
+        data = state.repos.get((owner.lower(), repo.lower()))
+        if data is None:
+            return Response(status_code=404, headers=headers)
+        body = json.dumps({
+            "name": repo,
+            "html_url": f"https://github.com/{owner}/{repo}",
+            "description": f"{owner}/{repo}",
+            **data
+        })
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        headers["ETag"] = etag
+        if request.headers.get("If-None-Match") == etag:
+            state.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    
+    return app
+
+app = create_app()
@@ -0,0 +1,80 @@
+"""In-memory stand-in for the boto3 S3 client calls S3Storage makes.
+
+Keeps objects in a dict per bucket and raises ClientError with S3's error
+codes, so S3Storage can be tested without boto3, moto or a bucket:
+
+    storage = S3Storage(bucket="resumes", client=FakeS3Client())
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+class ClientError(Exception):
+    """Mirrors botocore's ClientError: the error code is in ``response``"""
+    
+    def __init__(self, code, operation):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation")
+        self.response = {"Error": {"Code": code}}
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+    
+    def read(self):
+        return self._data
+
+class _Paginator:
+    def __init__(self, client, page_size):
+        self.client = client
+        self.page_size = page_size
+    
+    def paginate(self, Bucket, Prefix=""):
+        keys = sorted(k for k in self.client._bucket(Bucket) if k.startswith(Prefix))
+        for start in range(0, max(len(keys), 1), self.page_size):
+            page = keys[start:start + self.page_size]
+            yield {"Contents": [
+                {"Key": k, "LastModified": self.client._bucket(Bucket)[k][1]} for k in page
+            ]} if page else {}
+
+class FakeS3Client:
+    """Objects live in ``buckets[bucket][key] = (bytes, last modified)``"""
+    
+    def __init__(self, buckets=("resumes",), page_size=1000):
+        self.buckets = {name: {} for name in buckets}
+        self.page_size = page_size
+        self.exceptions = SimpleNamespace(ClientError=ClientError)
+        self.calls = 0
+    
+    def _bucket(self, name):
+        if name not in self.buckets:
+            raise ClientError("NoSuchBucket", "ListObjectsV2")
+        return self.buckets[name]
+    
+    def put_object(self, Bucket, Key, Body):
+        self.calls += 1
+        self._bucket(Bucket)[Key] = (bytes(Body), datetime.now(timezone.utc))
+    
+    def upload_file(self, Filename, Bucket, Key):
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+    
+    def head_object(self, Bucket, Key):
+        self.calls += 1
+        if Key not in self._bucket(Bucket):
+            raise ClientError("404", "HeadObject")
+        data, modified = self._bucket(Bucket)[Key]
+        return {"ContentLength": len(data), "LastModified": modified}
+    
+    def get_object(self, Bucket, Key):
+        self.calls += 1
+        if Key not in self._bucket(Bucket):
+            raise ClientError("NoSuchKey", "GetObject")
+        return {"Body": _Body(self._bucket(Bucket)[Key][0])}
+    
+    def delete_object(self, Bucket, Key):
+        # S3 deletes are idempotent, missing keys are not an error
+        self.calls += 1
+        self._bucket(Bucket).pop(Key, None)
+    
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2", operation
+        return _Paginator(self, self.page_size)
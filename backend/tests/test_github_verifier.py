@@ -0,0 +1,108 @@
+"""AsyncGitHubVerifier against the stand-in API in tests/fake_github.py"""
+import asyncio
+import time
+
+import httpx
+
+from app.services.github_verifier import AsyncGitHubVerifier
+from tests.fake_github import create_app
+
+def make_verifier(app, **kwargs):
+    return AsyncGitHubVerifier(base_url="http://github.test", transport=httpx.ASGITransport(app=app), **kwargs)
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_links_are_verified_concurrently():
+    app = create_app(latency=0.2)
+    repos = {(f"user{i}", "repo"): {"stargazers_count": i} for i in range(10)}
+    app.state.repos = repos
+    verifier = make_verifier(app, max_concurrency=10)
+    text = " ".join(f"https://github.com/user{i}/repo" for i in range(10))
+    
+    async def check():
+        start = time.perf_counter()
+        results = await verifier.extract_github_links(text)
+        elapsed = time.perf_counter() - start
+        await verifier.aclose()
+        return results, elapsed
+    
+    results, elapsed = run(check())
+    assert [r["stars"] for r in results] == list(range(10))
+    assert elapsed < 1.0
+    assert app.state.max_in_flight == 10
+
+def test_concurrency_is_bounded():
+    app = create_app(latency=0.05)
+    app.state.repos = {(f"user{i}", "repo"): {} for i in range(12)}
+    verifier = make_verifier(app, max_concurrency=3)
+    text = " ".join(f"https://github.com/user{i}/repo" for i in range(12))
+    
+    async def check():
+        await verifier.extract_github_links(text)
+        await verifier.aclose()
+    
+    run(check())
+    assert app.state.calls == 12
+    assert app.state.max_in_flight == 3
+
+def test_hits_and_misses_are_cached():
+    app = create_app()
+    verifier = make_verifier(app)
+    text = "https://github.com/octocat/hello-world https://github.com/octocat/missing https://github.com/octocat/hello-world"
+    
+    async def check():
+        first = await verifier.extract_github_links(text)
+        second = await verifier.extract_github_links(text)
+        await verifier.aclose()
+        return first, second
+    
+    first, second = run(check())
+    assert [r["exists"] for r in first] == [True, False]
+    assert second == first
+    assert app.state.calls == 2
+
+def test_expired_entries_are_revalidated_with_etag():
+    app = create_app()
+    verifier = make_verifier(app, cache_ttl=0)
+    
+    async def check():
+        first = await verifier.verify_github_repo("psf", "requests")
+        second = await verifier.verify_github_repo("psf", "requests")
+        await verifier.aclose()
+        return first, second
+    
+    first, second = run(check())
+    assert first == second and first["stars"] == 52000
+    assert app.state.calls == 2
+    assert app.state.not_modified == 1
+
+def test_no_calls_once_rate_limited():
+    app = create_app(rate_limit=1)
+    verifier = make_verifier(app)
+    
+    async def check():
+        first = await verifier.verify_github_repo("octocat", "hello-world")
+        limited = await verifier.verify_github_repo("torvalds", "linux")
+        await verifier.aclose()
+        return first, limited
+    
+    first, limited = run(check())
+    assert first["exists"]
+    assert limited["error"] == "GitHub rate limit exceeded"
+    assert app.state.calls == 1
+
+def test_client_is_replaced_and_closed_on_a_new_loop():
+    verifier = make_verifier(create_app())
+    
+    async def lookup():
+        await verifier.verify_github_repo("octocat", "hello-world")
+        return verifier._client
+    
+    first = run(lookup())
+    verifier._cache.clear()
+    second = run(lookup())
+    assert second is not first
+    assert first.is_closed
+    run(verifier.aclose())
+    assert second.is_closed
@@ -0,0 +1,61 @@
+"""run_migrations on a file-backed SQLite database"""
+import threading
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app import migrations
+from app.database import create_db_engine
+from app.migrations import run_migrations
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+def applied(engine):
+    with engine.connect() as conn:
+        return [v for (v,) in conn.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+
+def test_fresh_database_is_created_and_versioned(engine):
+    run_migrations(engine)
+    run_migrations(engine)
+    assert applied(engine) == [number for number, _, _ in migrations.MIGRATIONS]
+    assert "resumes" in inspect(engine).get_table_names()
+
+def test_concurrent_workers_apply_each_migration_once(engine, monkeypatch):
+    calls = []
+    
+    def slow_migration(conn):
+        calls.append(threading.get_ident())
+        conn.execute(text("CREATE TABLE migrated_once (id INTEGER)"))
+    
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(99, "Slow", slow_migration)])
+    errors = []
+    
+    def start_worker():
+        try:
+            run_migrations(engine)
+        except Exception as e:
+            errors.append(e)
+    
+    workers = [threading.Thread(target=start_worker) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert errors == []
+    assert len(calls) == 1
+    assert applied(engine)[-1] == 99
+
+def test_failing_migration_rolls_back_and_raises(engine, monkeypatch):
+    def broken(conn):
+        conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise RuntimeError("boom")
+    
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(99, "Broken", broken)])
+    with pytest.raises(RuntimeError, match="boom"):
+        run_migrations(engine)
+    assert "half_done" not in inspect(engine).get_table_names()
+    assert "schema_version" not in inspect(engine).get_table_names()
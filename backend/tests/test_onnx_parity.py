@@ -0,0 +1,54 @@
+"""Parity of the ONNX encoder with the PyTorch one.
+
+Needs torch, onnxruntime and optimum (sentence-transformers[onnx]) plus the
+model weights; skipped otherwise. Run from backend/ with:
+
+    python -m pytest tests/test_onnx_parity.py
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum")
+from sentence_transformers import SentenceTransformer
+
+from app.services.ai_engine import MODEL_NAME, ONNX_MODEL_FILE, check_onnx_model_file
+
+JD = "Senior Python engineer: machine learning, NLP, SQL, Docker and AWS. 5 years of experience."
+
+RESUMES = [
+    "Python developer with 6 years of experience in machine learning and NLP. Built models with PyTorch.",
+    "Data engineer: SQL, Airflow, Docker, AWS. 4 years of professional experience.",
+    "Frontend developer working with React, TypeScript and CSS for 3 years.",
+    "Registered nurse with ICU experience and patient care certifications.",
+    "Machine learning researcher, NLP and transformers, Python, deployed on AWS with Docker.",
+    "Java backend developer, Spring Boot, PostgreSQL, Kubernetes.",
+]
+
+def load(backend):
+    try:
+        if backend == "onnx":
+            check_onnx_model_file(ONNX_MODEL_FILE)
+            return SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE})
+        return SentenceTransformer(MODEL_NAME)
+    except Exception as e:
+        pytest.skip(f"{backend} encoder unavailable: {e}")
+
+@pytest.fixture(scope="module")
+def embeddings():
+    texts = RESUMES + [JD]
+    return {
+        backend: np.asarray(load(backend).encode(texts, normalize_embeddings=True), dtype=np.float32)
+        for backend in ("torch", "onnx")
+    }
+
+def test_vectors_match(embeddings):
+    # Per-text cosine between the two encoders
+    cosine = (embeddings["torch"] * embeddings["onnx"]).sum(axis=1)
+    assert cosine.min() > 0.99
+
+def test_match_scores_match(embeddings):
+    scores = {backend: embs[:-1] @ embs[-1] * 100 for backend, embs in embeddings.items()}
+    assert np.abs(scores["torch"] - scores["onnx"]).max() < 2.0
+    assert list(np.argsort(-scores["torch"])[:3]) == list(np.argsort(-scores["onnx"])[:3])
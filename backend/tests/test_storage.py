@@ -0,0 +1,216 @@
+"""Blob storage backends, garbage collection and backend selection"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Resume
+from app.services import storage as storage_module
+from app.services.storage import LocalStorage, S3Storage, blob_key, collect_garbage, get_storage
+from app.services.uploads import SpooledUpload
+from tests.fake_s3 import FakeS3Client
+
+DIGEST = "ab" * 32
+KEY = blob_key(DIGEST, "Resume.PDF")
+DATA = b"%PDF-1.4 " + b"python developer " * 200
+
+needs_zstd = pytest.mark.skipif(storage_module.zstandard is None, reason="zstandard not installed")
+
+@pytest.fixture(params=["local", "s3"])
+def make_storage(request, tmp_path):
+    """Factory for either backend; storages made by one test share their data"""
+    client = FakeS3Client()
+    
+    def make(compress=False):
+        if request.param == "local":
+            return LocalStorage(tmp_path / "blobs", compress=compress)
+        return S3Storage(bucket="resumes", prefix="resumes/", client=client, compress=compress)
+    return make
+
+def make_upload(data, spool_bytes):
+    upload = SpooledUpload("resume.pdf", spool_bytes=spool_bytes)
+    upload.write(data)
+    upload.flush()
+    return upload
+
+def test_blob_key_keeps_lowercased_extension():
+    assert KEY == DIGEST + ".pdf"
+    assert blob_key(DIGEST, None) == DIGEST
+
+def test_put_get_exists_delete(make_storage):
+    storage = make_storage()
+    assert not storage.exists(KEY)
+    storage.put(KEY, DATA)
+    assert storage.exists(KEY)
+    assert storage.get(KEY) == DATA
+    assert [key for key, _ in storage.iter_blobs()] == [KEY]
+    storage.delete(KEY)
+    assert not storage.exists(KEY)
+    with pytest.raises(FileNotFoundError):
+        storage.get(KEY)
+
+@pytest.mark.parametrize("spool_bytes", [None, 0])
+def test_put_upload_from_memory_and_disk(make_storage, spool_bytes):
+    storage = make_storage()
+    upload = make_upload(DATA, spool_bytes)
+    try:
+        storage.put_upload(KEY, upload)
+    finally:
+        upload.close()
+    assert storage.get(KEY) == DATA
+
+@needs_zstd
+@pytest.mark.parametrize("spool_bytes", [None, 0])
+def test_compressed_blobs_round_trip(make_storage, spool_bytes):
+    storage = make_storage(compress=True)
+    upload = make_upload(DATA, spool_bytes)
+    try:
+        storage.put_upload(KEY, upload)
+    finally:
+        upload.close()
+    assert storage.get(KEY) == DATA
+    assert [key for key, _ in storage.iter_blobs()] == [KEY]
+
+@needs_zstd
+def test_blobs_stay_readable_after_compression_setting_changes(make_storage):
+    plain_key = blob_key("cd" * 32, "a.pdf")
+    make_storage(compress=False).put(plain_key, DATA)
+    make_storage(compress=True).put(KEY, DATA)
+    for storage in (make_storage(compress=False), make_storage(compress=True)):
+        assert storage.get(plain_key) == DATA
+        assert storage.get(KEY) == DATA
+        assert storage.exists(plain_key) and storage.exists(KEY)
+
+def test_compressed_blob_without_zstandard_fails_clearly(monkeypatch):
+    monkeypatch.setattr(storage_module, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        LocalStorage._decode(KEY + ".zst", b"\x28\xb5\x2f\xfd")
+
+def test_local_storage_shards_and_reads_flat_legacy_blobs(tmp_path):
+    storage = LocalStorage(tmp_path)
+    storage.put(KEY, DATA)
+    assert (tmp_path / DIGEST[:2] / DIGEST[2:4] / KEY).read_bytes() == DATA
+    legacy = blob_key("ef" * 32, "old.pdf")
+    (tmp_path / legacy).write_bytes(DATA)
+    assert storage.get(legacy) == DATA
+    storage.delete(legacy)
+    assert not (tmp_path / legacy).exists()
+
+def test_s3_listing_follows_pages():
+    storage = S3Storage(bucket="resumes", prefix="resumes/", client=FakeS3Client(page_size=2))
+    keys = [blob_key(f"{i:02x}" * 32, "r.pdf") for i in range(5)]
+    for key in keys:
+        storage.put(key, DATA)
+    assert sorted(key for key, _ in storage.iter_blobs()) == sorted(keys)
+
+def test_s3_storage_against_moto():
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="resumes")
+        storage = S3Storage(bucket="resumes", prefix="resumes/", client=client)
+        assert not storage.exists(KEY)
+        storage.put(KEY, DATA)
+        assert storage.exists(KEY)
+        assert storage.get(KEY) == DATA
+        assert [key for key, _ in storage.iter_blobs()] == [KEY]
+        storage.delete(KEY)
+        with pytest.raises(FileNotFoundError):
+            storage.get(KEY)
+
+# ===================== GARBAGE COLLECTION =====================
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def add_resume(db, file_path):
+    db.add(Resume(id=file_path, candidate_id="c1", filename="r.pdf", file_path=file_path))
+    db.commit()
+
+def age_blobs(storage, seconds):
+    """Backdate every stored blob by ``seconds``"""
+    if isinstance(storage, LocalStorage):
+        for dirpath, _, filenames in os.walk(storage.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                os.utime(path, (time.time() - seconds,) * 2)
+    else:
+        for objects in storage.client.buckets.values():
+            for name, (data, modified) in objects.items():
+                objects[name] = (data, modified - timedelta(seconds=seconds))
+
+def test_collect_garbage_deletes_only_old_unreferenced_blobs(db, make_storage):
+    storage = make_storage()
+    kept, orphan, legacy = (blob_key(c * 32, "r.pdf") for c in ("11", "22", "33"))
+    for key in (kept, orphan, legacy):
+        storage.put(key, DATA)
+    add_resume(db, kept)
+    add_resume(db, f"/srv/app/storage/resumes/{legacy}")  # rows from before sharding hold full paths
+    
+    assert collect_garbage(db, storage, min_age=3600) == []
+    age_blobs(storage, 7200)
+    
+    assert collect_garbage(db, storage, min_age=3600, dry_run=True) == [orphan]
+    assert storage.exists(orphan)
+    assert collect_garbage(db, storage, min_age=3600) == [orphan]
+    assert not storage.exists(orphan)
+    assert storage.exists(kept) and storage.exists(legacy)
+
+def test_collect_garbage_skips_recent_uploads(db, make_storage):
+    storage = make_storage()
+    storage.put(KEY, DATA)
+    assert collect_garbage(db, storage, min_age=3600) == []
+    assert collect_garbage(db, storage, min_age=0) == [KEY]
+
+# ===================== SELECTION =====================
+
+@pytest.fixture
+def configure(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage_module, "STORAGE_DIR", tmp_path)
+    
+    def configure(backend="local", compression="none"):
+        monkeypatch.setattr(storage_module, "STORAGE_BACKEND", backend)
+        monkeypatch.setattr(storage_module, "STORAGE_COMPRESSION", compression)
+        get_storage.cache_clear()
+    yield configure
+    get_storage.cache_clear()
+
+def test_get_storage_defaults_to_local(configure):
+    configure()
+    storage = get_storage()
+    assert isinstance(storage, LocalStorage) and not storage.compress
+
+@needs_zstd
+def test_get_storage_compresses_with_zstd(configure):
+    configure(compression="zstd")
+    assert get_storage().compress
+
+def test_get_storage_raises_without_zstandard(configure, monkeypatch):
+    monkeypatch.setattr(storage_module, "zstandard", None)
+    configure(compression="zstd")
+    with pytest.raises(RuntimeError, match="zstandard"):
+        get_storage()
+
+def test_get_storage_raises_without_boto3(configure, monkeypatch):
+    monkeypatch.setitem(sys.modules, "boto3", None)
+    configure(backend="s3")
+    with pytest.raises(RuntimeError, match="boto3"):
+        get_storage()
+
+@pytest.mark.parametrize("backend,compression", [("gcs", "none"), ("local", "gzip")])
+def test_get_storage_rejects_unknown_settings(configure, backend, compression):
+    configure(backend, compression)
+    with pytest.raises(ValueError):
+        get_storage()